@@ -2,12 +2,50 @@ import environ
 from django.conf import settings
 
 from spotipy import SpotifyManager as SM
+from spotipy.cache_handler import CacheFileHandler, DjangoCacheHandler
+from spotipy.http_cache import FileHTTPCache, MemoryHTTPCache
+
+from .token_cache import DatabaseCacheHandler
 
 env = environ.Env()
 environ.Env.read_env(settings.BASE_DIR / "cybotify" / ".env")
 
+_http_cache_dir = env("SPOTIFY_HTTP_CACHE_DIR", default=None)
+_http_cache_size = env.int("SPOTIFY_HTTP_CACHE_SIZE", default=0)
+if _http_cache_dir:
+    if _http_cache_size:
+        http_cache = FileHTTPCache(_http_cache_dir, max_size=_http_cache_size)
+    else:
+        http_cache = FileHTTPCache(_http_cache_dir)
+elif _http_cache_size:
+    http_cache = MemoryHTTPCache(max_size=_http_cache_size)
+else:
+    http_cache = None
+
+_client_id = env("SPOTIFY_CLIENT_ID")
+_app_token_file = env("SPOTIFY_APP_TOKEN_FILE", default=None)
+_app_token_cache_alias = env("SPOTIFY_APP_TOKEN_CACHE_ALIAS", default=None)
+if _app_token_file:
+    app_token_cache = CacheFileHandler(_app_token_file)
+elif _app_token_cache_alias:
+    app_token_cache = DjangoCacheHandler(_client_id, cache_alias=_app_token_cache_alias)
+elif env.bool("SPOTIFY_SHARED_APP_TOKEN", default=True):
+    app_token_cache = DatabaseCacheHandler(_client_id)
+else:
+    app_token_cache = None
+
 SpotifyManager = SM(
-    env("SPOTIFY_CLIENT_ID"),
+    _client_id,
     env("SPOTIFY_CLIENT_SECRET"),
     env("SPOTIFY_REDIRECT_URI"),
+    rate_limit=env.float("SPOTIFY_RATE_LIMIT", default=None),
+    rate_limit_file=env("SPOTIFY_RATE_LIMIT_FILE", default=None),
+    http_cache=http_cache,
+    request_deadline=env.float("SPOTIFY_REQUEST_DEADLINE", default=10),
+    api_prefix=env("SPOTIFY_API_PREFIX", default=None),
+    accounts_url=env("SPOTIFY_ACCOUNTS_URL", default=None),
+    trace_every=env.int("SPOTIFY_TRACE_EVERY", default=0),
+    http2=env.bool("SPOTIFY_HTTP2", default=False),
+    hedge_budget=env.float("SPOTIFY_HEDGE_BUDGET", default=0.05),
+    app_token_cache=app_token_cache,
 )
@@ -0,0 +1,57 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.accounts.models import SpotifyUserCredentials
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the Spotify tokens of recently active users before they expire, "
+        "so that their requests don't wait for a refresh"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=10,
+            help="Refresh the tokens expiring within this many minutes",
+        )
+        parser.add_argument(
+            "--active-within",
+            type=float,
+            default=24,
+            help=(
+                "Only for the tokens used, or whose user logged in, within "
+                "this many hours"
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Maximum number of tokens refreshed per run",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Run again every this many seconds, instead of once",
+        )
+
+    def handle(self, *args, **options):
+        window = datetime.timedelta(minutes=options["window"])
+        active_within = datetime.timedelta(hours=options["active_within"])
+        while True:
+            refreshed, failed = SpotifyUserCredentials.objects.refresh_expiring(
+                window,
+                active_since=timezone.now() - active_within,
+                limit=options["batch_size"],
+            )
+            self.stdout.write(f"Refreshed {refreshed} tokens ({failed} failed)")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
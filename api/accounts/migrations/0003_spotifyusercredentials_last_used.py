@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_spotifyapptoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spotifyusercredentials',
+            name='last_used',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
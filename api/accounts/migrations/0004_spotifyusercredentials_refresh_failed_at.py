@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_spotifyusercredentials_last_used'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spotifyusercredentials',
+            name='refresh_failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
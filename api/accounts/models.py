@@ -1,7 +1,8 @@
 import datetime
+import logging
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from api.music.models import UserPlaylist
@@ -9,6 +10,16 @@ from api.music.models import UserPlaylist
 from . import SpotifyManager
 from .util import random_string
 
+logger = logging.getLogger(__name__)
+
+# tokens this close to expiring are refreshed before being used
+EXPIRY_MARGIN = datetime.timedelta(minutes=1)
+# how often the time a token was last used is saved
+LAST_USED_PRECISION = datetime.timedelta(minutes=5)
+# tokens that couldn't be refreshed in the background (e.g. revoked ones)
+# are only tried again after this long
+REFRESH_RETRY_DELAY = datetime.timedelta(hours=1)
+
 
 class RegistrationStateManager(models.Manager):
     def unique_random_string(self, length):
@@ -52,11 +63,16 @@ class SpotifyUser(models.Model):
 
     def update_playlists(self):
         self.user.credentials.check_expired()
-        playlists = SpotifyManager.get_playlists(self.user.credentials.access_token)
+        self.user.credentials.mark_used()
+        playlists = SpotifyManager.iter_current_user_playlists(
+            self.user.credentials.access_token, user_id=self.spotify_id
+        )
+        playlist_ids = []
         for position, playlist in enumerate(playlists, 0):
             UserPlaylist.objects.create_or_update(playlist, self, position)
+            if "id" in playlist:
+                playlist_ids.append(playlist["id"])
 
-        playlist_ids = [pl["id"] for pl in playlists if "id" in pl]
         to_remove = self.userplaylist_set.filter(~models.Q(spotify_id__in=playlist_ids))
         self.userplaylist_set.remove(*to_remove)
 
@@ -73,6 +89,45 @@ class SpotifyUser(models.Model):
         return self.userplaylist_set.filter(status="CO")
 
 
+class SpotifyUserCredentialsManager(models.Manager):
+    def expiring(self, within, active_since):
+        """
+        Credentials expiring within `within` that were used, or whose user
+        logged in, since `active_since`, the soonest expiring first. Those
+        whose refresh failed within REFRESH_RETRY_DELAY are left out.
+        """
+        now = timezone.now()
+        # users on a long-lived session cookie don't log in again
+        return (
+            self.filter(
+                models.Q(last_used__gte=active_since)
+                | models.Q(user__last_login__gte=active_since),
+                expires_at__lte=now + within,
+            )
+            .exclude(refresh_failed_at__gt=now - REFRESH_RETRY_DELAY)
+            .order_by("expires_at")
+        )
+
+    def refresh_expiring(self, within, active_since, limit=None):
+        """
+        Refresh the tokens of active users before they expire, so that
+        their requests don't wait for a refresh. Refreshes go through the
+        app's rate limiter. Return the number of tokens refreshed and the
+        number of failures.
+        """
+        refreshed = failed = 0
+        for credentials in self.expiring(within, active_since)[:limit]:
+            SpotifyManager.rate_limiter.acquire()
+            try:
+                refreshed += credentials.check_expired(margin=within)
+            except Exception:
+                logger.exception("Couldn't refresh the token of %s", credentials)
+                # so that it doesn't take the place of the others on every run
+                self.filter(pk=credentials.pk).update(refresh_failed_at=timezone.now())
+                failed += 1
+        return refreshed, failed
+
+
 class SpotifyUserCredentials(models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="credentials"
@@ -80,16 +135,22 @@ class SpotifyUserCredentials(models.Model):
     access_token = models.CharField(max_length=400)
     refresh_token = models.CharField(max_length=400)
     expires_at = models.DateTimeField()
+    last_used = models.DateTimeField(null=True, blank=True)
+    refresh_failed_at = models.DateTimeField(null=True, blank=True)
+    objects = SpotifyUserCredentialsManager()
 
     def __str__(self):
         return f"(email={self.user.email})"
 
-    @property
-    def has_expired(self):
+    def expires_within(self, delta):
         if not self.expires_at:
             return True
 
-        return self.expires_at <= timezone.now() + timezone.timedelta(minutes=1)
+        return self.expires_at <= timezone.now() + delta
+
+    @property
+    def has_expired(self):
+        return self.expires_within(EXPIRY_MARGIN)
 
     def refresh(self):
         token_info = SpotifyManager.refresh_tokens(self.refresh_token)
@@ -98,8 +159,44 @@ class SpotifyUserCredentials(models.Model):
         self.expires_at = datetime.datetime.fromtimestamp(
             token_info["expires_at"], datetime.timezone.utc
         )
+        self.refresh_failed_at = None
         self.save()
 
-    def check_expired(self):
-        if self.has_expired:
-            self.refresh()
+    def mark_used(self):
+        """Record that the token is used to serve a request"""
+        now = timezone.now()
+        if self.last_used is None or self.last_used <= now - LAST_USED_PRECISION:
+            # without touching the token, which may be refreshed concurrently
+            SpotifyUserCredentials.objects.filter(pk=self.pk).update(last_used=now)
+            self.last_used = now
+
+    def check_expired(self, margin=EXPIRY_MARGIN):
+        """
+        Refresh the token if it expires within `margin`, and return whether
+        this call refreshed it
+        """
+        if not self.expires_within(margin):
+            return False
+        # concurrent requests for this user wait on the row lock while the
+        # first one refreshes, then find the new token
+        with transaction.atomic():
+            locked = SpotifyUserCredentials.objects.select_for_update().get(pk=self.pk)
+            refreshed = locked.expires_within(margin)
+            if refreshed:
+                locked.refresh()
+        self.refresh_from_db()
+        return refreshed
+
+
+class SpotifyAppToken(models.Model):
+    """
+    The client-credentials token of a Spotify app, shared by every process
+    so that a single one of them requests each new token
+    """
+
+    client_id = models.CharField(max_length=256, unique=True)
+    token_info = models.JSONField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"(client_id={self.client_id}, expires_at={self.expires_at})"
@@ -1,10 +1,21 @@
+from io import StringIO
 from unittest import mock
 
 from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
-from .models import RegistrationState, SpotifyUser, SpotifyUserCredentials, User  # noqa
+from spotipy import SpotifyClientCredentials
+
+from .models import (  # noqa
+    RegistrationState,
+    SpotifyAppToken,
+    SpotifyUser,
+    SpotifyUserCredentials,
+    User,
+)
+from .token_cache import DatabaseCacheHandler
 
 DEFAULT_USERNAME = "user"
 DEFAULT_EMAIL = "user@user.com"
@@ -133,3 +144,164 @@ class UserCredentialsTestCase(TestCase):
     def test_refresh(self, mock_refresh):
         self.user.credentials.refresh()
         self.assertFalse(self.user.credentials.has_expired)
+
+    @mock.patch(
+        "api.accounts.SpotifyManager.refresh_tokens", side_effect=fake_refresh_token
+    )
+    def test_check_expired_refreshes_once(self, mock_refresh):
+        # the same user's credentials, loaded by two concurrent requests
+        first = SpotifyUserCredentials.objects.get(pk=self.credentials.pk)
+        second = SpotifyUserCredentials.objects.get(pk=self.credentials.pk)
+        first.check_expired()
+        second.check_expired()
+        self.assertEqual(mock_refresh.call_count, 1)
+        self.assertFalse(second.has_expired)
+        self.assertEqual(second.expires_at, first.expires_at)
+
+        first.check_expired()
+        self.assertEqual(mock_refresh.call_count, 1)
+
+
+def fake_app_token():
+    return {"access_token": "APP_TOKEN", "expires_in": 3600}
+
+
+class DatabaseCacheHandlerTestCase(TestCase):
+    def make_credentials(self):
+        # one per worker process, each with its own handler
+        return SpotifyClientCredentials(
+            client_id="client_id",
+            client_secret="client_secret",
+            cache_handler=DatabaseCacheHandler("client_id"),
+        )
+
+    @mock.patch.object(
+        SpotifyClientCredentials,
+        "_request_access_token",
+        side_effect=fake_app_token,
+    )
+    def test_token_shared_between_processes(self, mock_request):
+        first, second = self.make_credentials(), self.make_credentials()
+        self.assertEqual(first.get_access_token(as_dict=False), "APP_TOKEN")
+        self.assertEqual(second.get_access_token(as_dict=False), "APP_TOKEN")
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(SpotifyAppToken.objects.get().client_id, "client_id")
+
+        # later lookups don't query the database
+        with self.assertNumQueries(0):
+            second.get_access_token(as_dict=False)
+
+    @mock.patch.object(
+        SpotifyClientCredentials,
+        "_request_access_token",
+        side_effect=fake_app_token,
+    )
+    def test_expired_token_refreshed(self, mock_request):
+        expired = dict(fake_app_token(), access_token="OLD", expires_at=0)
+        SpotifyAppToken.objects.create(client_id="client_id", token_info=expired)
+        credentials = self.make_credentials()
+        self.assertEqual(credentials.get_access_token(as_dict=False), "APP_TOKEN")
+        self.assertEqual(mock_request.call_count, 1)
+        token_info = SpotifyAppToken.objects.get().token_info
+        self.assertEqual(token_info["access_token"], "APP_TOKEN")
+
+
+class RefreshExpiringTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.active, _, _ = create_user_with_spotify_user_and_credentials(
+            username="active", spotify_id="active", expires_at=now
+        )
+        self.inactive, _, _ = create_user_with_spotify_user_and_credentials(
+            username="inactive", spotify_id="inactive", expires_at=now
+        )
+        self.fresh, _, _ = create_user_with_spotify_user_and_credentials(
+            username="fresh",
+            spotify_id="fresh",
+            expires_at=now + timezone.timedelta(hours=1),
+        )
+        User.objects.filter(username__in=["active", "fresh"]).update(last_login=now)
+        self.inactive.last_login = now - timezone.timedelta(days=30)
+        self.inactive.save()
+
+    def test_expiring(self):
+        expiring = SpotifyUserCredentials.objects.expiring(
+            timezone.timedelta(minutes=10),
+            active_since=timezone.now() - timezone.timedelta(days=1),
+        )
+        self.assertEqual([c.user.username for c in expiring], ["active"])
+
+    def test_used_without_logging_in(self):
+        # e.g. on a session cookie older than the window
+        self.inactive.credentials.mark_used()
+        expiring = SpotifyUserCredentials.objects.expiring(
+            timezone.timedelta(minutes=10),
+            active_since=timezone.now() - timezone.timedelta(days=1),
+        )
+        self.assertEqual(
+            sorted(c.user.username for c in expiring), ["active", "inactive"]
+        )
+        # later uses don't write to the database every time
+        with self.assertNumQueries(0):
+            self.inactive.credentials.mark_used()
+
+    @mock.patch(
+        "api.accounts.SpotifyManager.refresh_tokens", side_effect=fake_refresh_token
+    )
+    def test_command(self, mock_refresh):
+        out = StringIO()
+        call_command("refresh_spotify_tokens", stdout=out)
+        self.assertEqual(mock_refresh.call_count, 1)
+        self.assertIn("Refreshed 1 tokens (0 failed)", out.getvalue())
+        self.assertFalse(
+            SpotifyUserCredentials.objects.get(user=self.active).expires_within(
+                timezone.timedelta(minutes=10)
+            )
+        )
+        self.assertTrue(
+            SpotifyUserCredentials.objects.get(user=self.inactive).has_expired
+        )
+
+    @mock.patch(
+        "api.accounts.SpotifyManager.refresh_tokens", side_effect=Exception("revoked")
+    )
+    def test_failures_are_counted(self, mock_refresh):
+        refreshed, failed = SpotifyUserCredentials.objects.refresh_expiring(
+            timezone.timedelta(minutes=10),
+            active_since=timezone.now() - timezone.timedelta(days=1),
+        )
+        self.assertEqual((refreshed, failed), (0, 1))
+
+    def test_failures_dont_block_others(self):
+        healthy, _, _ = create_user_with_spotify_user_and_credentials(
+            username="healthy",
+            spotify_id="healthy",
+            expires_at=timezone.now() + timezone.timedelta(minutes=5),
+        )
+        User.objects.filter(pk=healthy.pk).update(last_login=timezone.now())
+
+        def refresh(refresh_token):
+            if SpotifyUserCredentials.objects.filter(
+                user=self.active, refresh_token=refresh_token
+            ).exists():
+                raise Exception("revoked")
+            return fake_refresh_token(refresh_token)
+
+        SpotifyUserCredentials.objects.filter(user=self.active).update(
+            refresh_token="REVOKED"
+        )
+        within = timezone.timedelta(minutes=10)
+        active_since = timezone.now() - timezone.timedelta(days=1)
+        with mock.patch(
+            "api.accounts.SpotifyManager.refresh_tokens", side_effect=refresh
+        ):
+            results = [
+                SpotifyUserCredentials.objects.refresh_expiring(
+                    within, active_since, limit=1
+                )
+                for _ in range(2)
+            ]
+        self.assertEqual(results, [(0, 1), (1, 0)])
+        self.assertFalse(
+            SpotifyUserCredentials.objects.get(user=healthy).expires_within(within)
+        )
@@ -0,0 +1,63 @@
+import datetime
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from spotipy.cache_handler import EXPIRY_MARGIN, CacheHandler
+
+
+class DatabaseCacheHandler(CacheHandler):
+    """
+    Keeps the app's client-credentials token in the database, so that every
+    worker process uses the same token.
+
+    Each process keeps a copy of the token in memory until it is about to
+    expire. Refreshes lock the token's row, so the other processes wait
+    for the new token instead of requesting their own.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self._token_info = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, token_info):
+        return token_info["expires_at"] - time.time() >= EXPIRY_MARGIN
+
+    def get_cached_token(self):
+        token_info = self._token_info
+        if token_info is not None and self._is_fresh(token_info):
+            return token_info
+
+        # models can't be imported before the app registry is ready
+        from .models import SpotifyAppToken
+
+        row = SpotifyAppToken.objects.filter(client_id=self.client_id).first()
+        if row is None or not row.token_info:
+            return None
+        self._token_info = row.token_info
+        return row.token_info
+
+    def save_token_to_cache(self, token_info):
+        from .models import SpotifyAppToken
+
+        self._token_info = token_info
+        expires_at = datetime.datetime.fromtimestamp(
+            token_info["expires_at"], datetime.timezone.utc
+        )
+        SpotifyAppToken.objects.update_or_create(
+            client_id=self.client_id,
+            defaults={"token_info": token_info, "expires_at": expires_at},
+        )
+
+    @contextmanager
+    def refresh_lock(self):
+        from .models import SpotifyAppToken
+
+        # threads of this process wait here, other processes on the row lock
+        with self._lock, transaction.atomic():
+            SpotifyAppToken.objects.get_or_create(client_id=self.client_id)
+            SpotifyAppToken.objects.select_for_update().get(client_id=self.client_id)
+            yield
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.accounts import SpotifyManager
+from api.music.models import UserPlaylist
+from spotipy.exceptions import SpotifyTimeoutError
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the playlists that page views ran out of time updating, "
+        "with a larger time budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deadline",
+            type=float,
+            default=600,
+            help="Seconds each playlist can spend calling Spotify",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Maximum number of playlists updated per run",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Run again every this many seconds, instead of once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            synced = failed = 0
+            pending = UserPlaylist.objects.filter(sync_pending=True).order_by(
+                "last_updated"
+            )
+            for playlist in pending[: options["batch_size"]]:
+                try:
+                    with SpotifyManager.deadline(options["deadline"]):
+                        playlist.check_update()
+                    synced += 1
+                except SpotifyTimeoutError:
+                    self.stderr.write(f"Timed out updating playlist {playlist.id}")
+                    failed += 1
+                except Exception as error:
+                    self.stderr.write(
+                        f"Couldn't update playlist {playlist.id}: {error}"
+                    )
+                    failed += 1
+            self.stdout.write(f"Updated {synced} playlists ({failed} failed)")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
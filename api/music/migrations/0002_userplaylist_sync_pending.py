@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('music', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userplaylist',
+            name='sync_pending',
+            field=models.BooleanField(default=False),
+        ),
+    ]
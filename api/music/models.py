@@ -39,6 +39,8 @@ class UserPlaylist(models.Model):
     )
     owner = models.CharField(max_length=256)
     last_updated = models.DateTimeField(auto_now=True)
+    # a page view ran out of time updating it, see the sync_playlists command
+    sync_pending = models.BooleanField(default=False)
     objects = UserPlaylistManager()
 
     class Status(models.TextChoices):
@@ -69,13 +71,19 @@ class UserPlaylist(models.Model):
                     "We don't have credentials for any of the "
                     f"collaborators on playlist {self.pk}"
                 )
-            user = self.users.first().user
+            spotify_user = self.users.first()
+            user = spotify_user.user
             user.credentials.check_expired()
-            return SpotifyManager.user_client(user.credentials.access_token)
+            user.credentials.mark_used()
+            return SpotifyManager.user_client(
+                user.credentials.access_token, user_id=spotify_user.spotify_id
+            )
 
     def get_latest_snapshot(self):
         sp = self.get_client()
-        return sp.playlist(self.spotify_id, fields="snapshot_id")["snapshot_id"]
+        # a page waits for this, so don't let one slow response hold it up
+        with SpotifyManager.hedged_requests():
+            return sp.playlist(self.spotify_id, fields="snapshot_id")["snapshot_id"]
 
     def needs_update(self):
         current = self.get_latest_snapshot()
@@ -96,8 +104,16 @@ class UserPlaylist(models.Model):
             self.save()
 
     def update_tracks(self, get_features=True):
+        with SpotifyManager.count_calls() as counter:
+            self._update_tracks(get_features=get_features)
+        logger.info(
+            f"Updated playlist {self.id} with {counter.calls} Spotify API calls"
+        )
+
+    def _update_tracks(self, get_features):
         sp = self.get_client()
-        tracks = SpotifyManager.get_playlist_tracks(sp, self.spotify_id)
+        tracks = SpotifyManager.iter_playlist_tracks(sp, self.spotify_id)
+        track_ids = []
         for position, track_data in enumerate(tracks, 0):
             artists = " =|AND|= ".join(
                 artist["name"] for artist in track_data["artists"]
@@ -114,10 +130,10 @@ class UserPlaylist(models.Model):
             PlaylistTrackRelationship.objects.update_or_create(
                 playlist=self, track=track, defaults={"track_position": position}
             )
+            track_ids.append(track_data["id"])
 
         self.save()
 
-        track_ids = [tr["id"] for tr in tracks if "id" in tr]
         to_remove = self.track_set.filter(~models.Q(spotify_id__in=track_ids))
         self.track_set.remove(*to_remove)
 
@@ -129,6 +145,9 @@ class UserPlaylist(models.Model):
         needs_update, current = self.needs_update()
         if not needs_update:
             logger.info(f"Playlist {self.id} is up to date")
+            if self.sync_pending:
+                self.sync_pending = False
+                self.save()
             return
 
         logger.info(f"Playlist {self.id} is outdated, updating")
@@ -136,11 +155,13 @@ class UserPlaylist(models.Model):
         self.update_info()
         self.update_tracks(get_features)
         self.snapshot_id = current
+        self.sync_pending = False
+        self.save()
 
     def update_track_features(self):
         missing = self.track_set.filter(track_features=None, features_unavailable=False)
         track_ids = [track.spotify_id for track in missing]
-        features = SpotifyManager.get_track_features(track_ids)
+        features = SpotifyManager.iter_track_features(track_ids)
         for track, features_data in zip(missing, features):
             if not features_data:
                 track.features_unavailable = True
@@ -198,13 +219,18 @@ class Track(models.Model):
     def get_features(self):
         # note: this is a VERY slow way of getting track features!
         # if possible, user UserPlaylist.update_track_features
+        # (lookups made by concurrent requests are at least batched together)
         if hasattr(self, "track_features"):
             return
         if self.features_unavailable:
             return
 
         logger.info(f"getting features for track {self.id}")
-        track_features_data = SpotifyManager.get_track_features([self.spotify_id])[0]
+        track_features_data = SpotifyManager.get_single_track_features(self.spotify_id)
+        if not track_features_data:
+            self.features_unavailable = True
+            self.save()
+            return
         self.track_features = TrackFeatures(
             track=self,
             acousticness=track_features_data["acousticness"],
@@ -1,6 +1,13 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
 from django.test import TestCase
 
+from spotipy.exceptions import SpotifyTimeoutError
+
 from .models import Track, TrackFeatures, UserPlaylist  # noqa
+from .views import check_update_within_deadline
 
 
 class TrackTestCase(TestCase):
@@ -20,3 +27,30 @@ class TrackTestCase(TestCase):
 
         self.assertEqual(artist_list, ["artist1", "artist2"])
         self.assertEqual(artists_comma_separated, "artist1, artist2")
+
+
+@mock.patch.object(UserPlaylist, "update_info")
+@mock.patch.object(UserPlaylist, "needs_update", return_value=(True, "NEW"))
+class TimedOutSyncTestCase(TestCase):
+    def setUp(self):
+        self.playlist = UserPlaylist.objects.create(
+            spotify_id="PLID", snapshot_id="OLD", name="playlist", status="PU"
+        )
+
+    def test_timed_out_sync_is_finished_in_background(self, *mocks):
+        with mock.patch.object(
+            UserPlaylist, "update_tracks", side_effect=SpotifyTimeoutError()
+        ):
+            check_update_within_deadline(self.playlist, False)
+        self.playlist.refresh_from_db()
+        self.assertTrue(self.playlist.sync_pending)
+        self.assertEqual(self.playlist.snapshot_id, "OLD")
+
+        out = StringIO()
+        with mock.patch.object(UserPlaylist, "update_tracks") as update_tracks:
+            call_command("sync_playlists", stdout=out)
+        update_tracks.assert_called_once()
+        self.assertIn("Updated 1 playlists (0 failed)", out.getvalue())
+        self.playlist.refresh_from_db()
+        self.assertFalse(self.playlist.sync_pending)
+        self.assertEqual(self.playlist.snapshot_id, "NEW")
@@ -1,6 +1,11 @@
+import logging
+
 from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 
+from api.accounts import SpotifyManager
+from spotipy.exceptions import SpotifyTimeoutError
+
 from .models import Track, UserPlaylist
 from .permissions import HasPlaylistAccess, HasSpotifyUser
 from .serializers import (
@@ -11,6 +16,25 @@ from .serializers import (
     TrackWithFeaturesSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def check_update_within_deadline(playlist, get_features):
+    """
+    Update a playlist if Spotify answers in time, otherwise serve the
+    stored version and leave the update to the sync_playlists command,
+    which has a larger time budget
+    """
+    try:
+        with SpotifyManager.deadline():
+            playlist.check_update(get_features)
+    except SpotifyTimeoutError:
+        logger.warning(
+            f"Timed out updating playlist {playlist.id}, serving stored data "
+            "until the sync_playlists command updates it"
+        )
+        UserPlaylist.objects.filter(pk=playlist.pk).update(sync_pending=True)
+
 
 class PlaylistViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserPlaylist.objects.all()
@@ -35,7 +59,7 @@ class PlaylistViewSet(viewsets.ReadOnlyModelViewSet):
         except UserPlaylist.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        playlist.check_update(False)
+        check_update_within_deadline(playlist, False)
         serializer = PlaylistDetailSerializer(playlist)
         return Response(serializer.data)
 
@@ -55,7 +79,7 @@ class PlaylistFeaturesViewSet(viewsets.ReadOnlyModelViewSet):
         except UserPlaylist.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        playlist.check_update(True)
+        check_update_within_deadline(playlist, True)
         serializer = PlaylistFeaturesSerializer(playlist)
         return Response(serializer.data)
 
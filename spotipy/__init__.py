@@ -1,5 +1,18 @@
+from .async_client import *  # noqa
+from .batching import *  # noqa
+from .cassette import *  # noqa
 from .client import *  # noqa
+from .deadline import *  # noqa
 from .exceptions import *  # noqa
+from .flow_control import *  # noqa
+from .hedging import *  # noqa
+from .http2 import *  # noqa
+from .http_cache import *  # noqa
+from .json_codec import *  # noqa
 from .manager import *  # noqa
+from .metrics import *  # noqa
 from .oauth2 import *  # noqa
+from .rate_limit import *  # noqa
+from .singleflight import *  # noqa
+from .tracing import *  # noqa
 from .util import *  # noqa
@@ -0,0 +1,345 @@
+""" An asyncio-native twin of the Spotify client """
+
+__all__ = ["AsyncSpotify"]
+
+import asyncio
+import logging
+import time
+import warnings
+
+import httpx
+
+from spotipy.client import Spotify
+from spotipy.deadline import check_deadline, deadline_timeout, remaining_time
+from spotipy.exceptions import SpotifyException, SpotifyTimeoutError
+from spotipy.metrics import is_recording
+from spotipy.util import chunked, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+async def _resolve(result):
+    """Await `result` if it is awaitable, otherwise return it unchanged"""
+    if asyncio.iscoroutine(result):
+        return await result
+    return result
+
+
+class AsyncSpotify(Spotify):
+    """
+    Asynchronous version of the Spotify client.
+
+    Every endpoint method of :class:`Spotify` is available with the same
+    signature, but returns a coroutine that must be awaited::
+
+        async with AsyncSpotify(auth=access_token) as sp:
+            playlists = await sp.current_user_playlists()
+            while playlists:
+                ...
+                playlists = await sp.next(playlists)
+
+    Requests are sent with an ``httpx.AsyncClient``, so many calls can be in
+    flight at once from a single event loop, e.g. with ``asyncio.gather``.
+    """
+
+    def __init__(
+        self, auth=None, requests_session=True, *args, max_connections=100, **kwargs
+    ):
+        """
+        Creates an asynchronous Spotify API client.
+
+        Takes the same arguments as :class:`Spotify`, except that
+        `requests_session` may be an ``httpx.AsyncClient`` (or a truthy value
+        to create one lazily), `single_flight` must be an AsyncSingleFlight,
+        `http_cache`, `concurrency_limiter` and `hedging` are not supported,
+        and:
+
+        :param max_connections:
+            Maximum number of concurrent connections held by the client
+            created when no `requests_session` is given
+        """
+        self.max_connections = max_connections
+        super().__init__(auth, True, *args, **kwargs)
+        if isinstance(requests_session, httpx.AsyncClient):
+            self._session = requests_session
+
+    def _build_session(self):
+        # the httpx client is created on first use, inside the running loop
+        self._session = None
+
+    def __del__(self):
+        pass
+
+    @property
+    def session(self):
+        if self._session is None:
+            proxies = self.proxies or {}
+            transport = httpx.AsyncHTTPTransport(
+                retries=self.retries or 0,
+                limits=httpx.Limits(max_connections=self.max_connections),
+                proxy=proxies.get("https") or proxies.get("http"),
+            )
+            self._session = httpx.AsyncClient(
+                timeout=self.requests_timeout, transport=transport
+            )
+        return self._session
+
+    async def aclose(self):
+        """Close the underlying connection pool"""
+        if isinstance(self._session, httpx.AsyncClient):
+            await self._session.aclose()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _async_auth_headers(self):
+        if self._auth or not self.auth_manager:
+            return self._auth_headers()
+        # fetching a token may block on the network, so keep it off the loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._auth_headers)
+
+    def _retry_delay(self, attempt, response):
+        default = self.backoff_factor * (2 ** (attempt - 1))
+        return parse_retry_after(response.headers, default)
+
+    async def _acquire_rate_limit(self):
+        if self.rate_limiter is None:
+            return
+        wait = self.rate_limiter.reserve()
+        while wait > 0:
+            remaining = remaining_time()
+            if remaining is not None and wait > remaining:
+                raise SpotifyTimeoutError("Deadline exceeded waiting for rate limit")
+            await asyncio.sleep(wait)
+            wait = self.rate_limiter.reserve()
+
+    async def _internal_call(self, method, url, payload, params, raw=False):
+        url, headers, args = self._prepare_request(
+            method, url, payload, params, await self._async_auth_headers()
+        )
+
+        if method == "GET" and self.single_flight is not None:
+            key = self._request_key(url, args["params"], headers)
+            if raw:
+                key += " raw"
+            return await self.single_flight.do(
+                key, lambda: self._request(method, url, headers, args, raw)
+            )
+        return await self._request(method, url, headers, args, raw)
+
+    async def _guarded_request(self, method, url, headers, args):
+        # the concurrency limiter blocks its thread, so only the circuit
+        # breaker applies here
+        timeout = deadline_timeout(self.requests_timeout)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_call()
+
+        status = None
+        # by the caller's deadline or cancellation, which says nothing
+        # about Spotify's health
+        cut_short = False
+        try:
+            response = await self.session.request(
+                method,
+                url,
+                headers=headers,
+                content=args.get("data"),
+                timeout=timeout,
+            )
+            status = response.status_code
+            return response
+        except httpx.TimeoutException:
+            # the timeout may have been cut short by the deadline
+            try:
+                check_deadline()
+            except SpotifyTimeoutError:
+                cut_short = True
+                raise
+            raise
+        except asyncio.CancelledError:
+            cut_short = True
+            raise
+        finally:
+            if self.circuit_breaker is not None:
+                if cut_short:
+                    self.circuit_breaker.cancel()
+                else:
+                    self.circuit_breaker.record(status)
+
+    async def _request(self, method, url, headers, args, raw=False):
+        params = {k: v for k, v in args["params"].items() if v is not None}
+        # passing `params` to httpx would drop any query string already in `url`
+        request_url = httpx.URL(url).copy_merge_params(params)
+
+        response = None
+        attempt = 0
+        decode_time = 0
+        traced = self.tracer is not None and self.tracer.sample()
+        start = time.monotonic()
+        try:
+            while True:
+                attempt += 1
+                await self._acquire_rate_limit()
+                response = await self._guarded_request(
+                    method, request_url, headers, args
+                )
+                if (
+                    response.status_code in self.status_forcelist
+                    and attempt <= self.status_retries
+                ):
+                    delay = self._retry_delay(attempt, response)
+                    remaining = remaining_time()
+                    if remaining is not None and delay >= remaining:
+                        raise SpotifyTimeoutError()
+                    if response.status_code == 429 and self.rate_limiter is not None:
+                        # the limiter makes every client sharing it wait
+                        self.rate_limiter.pause(delay)
+                        continue
+                    logger.debug(
+                        "Retrying %s to %s after %s (status %s)",
+                        method,
+                        url,
+                        delay,
+                        response.status_code,
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                break
+
+            if response.is_error:
+                msg, reason = self._error_details(response)
+
+                logger.error(
+                    "HTTP Error for %s to %s with Params: %s returned %s due to %s",
+                    method,
+                    url,
+                    params,
+                    response.status_code,
+                    msg,
+                )
+
+                raise SpotifyException(
+                    response.status_code,
+                    -1,
+                    f"{response.url}:\n {msg}",
+                    reason=reason,
+                    headers=response.headers,
+                )
+
+            decode_start = time.monotonic()
+            try:
+                results = self._decode(response.content, raw)
+            except ValueError:
+                results = None
+            decode_time = time.monotonic() - decode_start
+        finally:
+            if is_recording(self.metrics):
+                latency = time.monotonic() - start
+                self._record_request(
+                    method, url, response, latency, max(attempt - 1, 0), decode_time
+                )
+            if traced:
+                latency = time.monotonic() - start
+                self.tracer.trace(method, url, args, headers, response, latency)
+
+        return results
+
+    async def _bulk_lookup(self, lookup, type, ids, batch_size, **kwargs):
+        id_list = [self._get_id(type, i) for i in ids]
+        batches = chunked(dict.fromkeys(id_list), batch_size)
+        key = type + "s"
+        semaphore = asyncio.Semaphore(max(self.max_workers or 1, 1))
+
+        async def get_batch(batch):
+            async with semaphore:
+                return await lookup(batch, **kwargs)
+
+        found = {}
+        responses = await asyncio.gather(*(get_batch(batch) for batch in batches))
+        for batch, response in zip(batches, responses):
+            found.update(zip(batch, response[key]))
+        return [found.get(i) for i in id_list]
+
+    async def audio_features(self, tracks=[]):
+        """Get audio features for one or multiple tracks based upon their Spotify IDs
+        Parameters:
+            - tracks - a list of track URIs, URLs or IDs, maximum: 100 ids
+        """
+        if isinstance(tracks, str):
+            trackid = self._get_id("track", tracks)
+            results = await self._get("audio-features/?ids=" + trackid)
+        else:
+            tlist = [self._get_id("track", t) for t in tracks]
+            results = await self._get("audio-features/?ids=" + ",".join(tlist))
+        if "audio_features" in results:
+            return results["audio_features"]
+        else:
+            return results
+
+    # these return None without making a request when given bad arguments
+    async def start_playback(self, *args, **kwargs):
+        return await _resolve(super().start_playback(*args, **kwargs))
+
+    async def seek_track(self, *args, **kwargs):
+        return await _resolve(super().seek_track(*args, **kwargs))
+
+    async def repeat(self, *args, **kwargs):
+        return await _resolve(super().repeat(*args, **kwargs))
+
+    async def volume(self, *args, **kwargs):
+        return await _resolve(super().volume(*args, **kwargs))
+
+    async def shuffle(self, *args, **kwargs):
+        return await _resolve(super().shuffle(*args, **kwargs))
+
+    async def _search_multiple_markets(self, q, limit, offset, type, markets, total):
+        if total and limit > total:
+            limit = total
+            warnings.warn(
+                "limit was auto-adjusted to equal {} as it must not be higher than total".format(
+                    total
+                ),
+                UserWarning,
+            )
+
+        results = {}
+        first_type = type.split(",")[0] + "s"
+        count = 0
+        budget = {"limit": limit}
+        semaphore = asyncio.Semaphore(max(self.max_workers or 1, 1))
+
+        async def search(country):
+            async with semaphore:
+                return await self._get(
+                    "search",
+                    q=q,
+                    limit=budget["limit"],
+                    offset=offset,
+                    type=type,
+                    market=country,
+                )
+
+        searches = [asyncio.ensure_future(search(country)) for country in markets]
+        try:
+            for country, search_task in zip(markets, searches):
+                result = await search_task
+                items = result[first_type]["items"]
+                if total and count + len(items) > total:
+                    del items[total - count :]
+                results[country] = result
+
+                count += len(items)
+                if total and count >= total:
+                    break
+                if total and budget["limit"] > total - count:
+                    budget["limit"] = total - count
+        finally:
+            for search_task in searches:
+                search_task.cancel()
+
+        return results
@@ -0,0 +1,88 @@
+""" Micro-batching of single-item lookups made by concurrent callers """
+
+__all__ = ["MicroBatcher"]
+
+import copy
+import threading
+
+
+class _Batch:
+    def __init__(self):
+        self.keys = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Collects the keys submitted by concurrent threads within a short window
+    and looks them up with a single call, e.g. the audio features of the
+    tracks requested by several page views at once.
+
+    The first thread to submit a key to a batch waits up to `max_wait`
+    seconds, or until the batch is full, then calls `lookup` with every key
+    collected so far. Each thread gets its own copy of its result.
+
+    Counters:
+        - batches - number of calls made to `lookup`
+        - items - number of keys submitted
+    """
+
+    def __init__(self, lookup, max_batch_size=100, max_wait=0.02):
+        """
+        Parameters:
+            * lookup: Function taking a list of keys and returning the list
+                      of their results, in the same order
+            * max_batch_size: Maximum number of keys per call to `lookup`
+            * max_wait: Seconds a batch waits for more keys before the call
+        """
+        self.lookup = lookup
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._batch = None
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {"batches": self.batches, "items": self.items}
+
+    def submit(self, key):
+        """Return the result of looking up `key`, batched with other callers"""
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            position = batch.keys.setdefault(key, len(batch.keys))
+            self.items += 1
+            if len(batch.keys) >= self.max_batch_size:
+                # later keys go to a new batch
+                self._batch = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+                self.batches += 1
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return copy.deepcopy(batch.results[position])
+
+    def _run(self, batch):
+        try:
+            batch.results = self.lookup(list(batch.keys))
+        except BaseException as error:
+            batch.error = error
+            raise
+        finally:
+            batch.done.set()
@@ -1,18 +1,27 @@
 __all__ = [
     "CacheHandler",
     "CacheFileHandler",
+    "DjangoCacheHandler",
     "MemoryCacheHandler",
 ]
 
+import contextlib
 import errno
 import json
 import logging
 import os
+import tempfile
+import threading
+import time
+import uuid
 
-from spotipy.util import CLIENT_CREDS_ENV_VARS
+from spotipy.util import CLIENT_CREDS_ENV_VARS, file_lock
 
 logger = logging.getLogger(__name__)
 
+# tokens this close to expiring are looked up in shared caches again
+EXPIRY_MARGIN = 60
+
 
 class CacheHandler:
     """
@@ -21,7 +30,8 @@ class CacheHandler:
 
     Custom extensions of this class must implement get_cached_token
     and save_token_to_cache methods with the same input and output
-    structure as the CacheHandler class.
+    structure as the CacheHandler class. Handlers shared by several
+    processes should also implement refresh_lock.
     """
 
     def get_cached_token(self):
@@ -38,11 +48,23 @@ class CacheHandler:
         raise NotImplementedError()
         return None
 
+    def refresh_lock(self):
+        """
+        Return a context manager held while an expired token is refreshed.
+        Callers waiting for it then find the new token in the cache rather
+        than requesting their own.
+        """
+        return contextlib.nullcontext()
+
 
 class CacheFileHandler(CacheHandler):
     """
     Handles reading and writing cached Spotify authorization tokens
     as json files on disk.
+
+    Tokens are written to a temporary file renamed over the cache, under a
+    file lock, so readers never see a partial file. The last token read is
+    kept in memory until the file changes.
     """
 
     def __init__(self, cache_path=None, username=None):
@@ -62,32 +84,73 @@ class CacheFileHandler(CacheHandler):
             if username:
                 cache_path += "-" + str(username)
             self.cache_path = cache_path
+        # (file signature, token_info) of the last read
+        self._cached = None
+        self._lock = threading.RLock()
+        self._holds_file_lock = False
 
     def get_cached_token(self):
-        token_info = None
-
         try:
-            f = open(self.cache_path)
-            token_info_string = f.read()
-            f.close()
-            token_info = json.loads(token_info_string)
-
+            stat = os.stat(self.cache_path)
         except OSError as error:
             if error.errno == errno.ENOENT:
                 logger.debug("cache does not exist at: %s", self.cache_path)
             else:
                 logger.warning("Couldn't read cache at: %s", self.cache_path)
+            return None
+
+        # a rename changes the inode, even within the mtime resolution
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._cached
+        if cached is not None and cached[0] == signature:
+            return cached[1]
 
+        try:
+            with open(self.cache_path) as f:
+                token_info = json.load(f)
+        except OSError:
+            logger.warning("Couldn't read cache at: %s", self.cache_path)
+            return None
+        self._cached = (signature, token_info)
         return token_info
 
     def save_token_to_cache(self, token_info):
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
         try:
-            f = open(self.cache_path, "w")
-            f.write(json.dumps(token_info))
-            f.close()
+            with self._locked():
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cache-")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(token_info, f)
+                    os.replace(tmp_path, self.cache_path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
         except OSError:
             logger.warning("Couldn't write token to cache at: %s", self.cache_path)
 
+    def refresh_lock(self):
+        return self._locked()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Lock out the other threads, then the other processes"""
+        with self._lock:
+            if self._holds_file_lock:
+                # e.g. saving the token refreshed under refresh_lock
+                yield
+                return
+            with contextlib.ExitStack() as stack:
+                try:
+                    stack.enter_context(file_lock(self.cache_path + ".lock"))
+                except OSError:
+                    logger.warning("Couldn't lock cache at: %s", self.cache_path)
+                self._holds_file_lock = True
+                try:
+                    yield
+                finally:
+                    self._holds_file_lock = False
+
 
 class MemoryCacheHandler(CacheHandler):
     """
@@ -102,9 +165,84 @@ class MemoryCacheHandler(CacheHandler):
             * token_info: The token info to store in memory. Can be None.
         """
         self.token_info = token_info
+        self._refresh_lock = threading.Lock()
 
     def get_cached_token(self):
         return self.token_info
 
     def save_token_to_cache(self, token_info):
         self.token_info = token_info
+
+    def refresh_lock(self):
+        return self._refresh_lock
+
+
+class DjangoCacheHandler(CacheHandler):
+    """
+    Keeps token info in a Django cache, e.g. one shared by every node of a
+    deployment, until the access token expires. Token info with a refresh
+    token is kept until it is replaced, so that the token can be refreshed.
+
+    The last token read is kept in memory until it is about to expire, and
+    refresh_lock is held across processes with the cache's atomic `add`.
+    """
+
+    def __init__(self, key, cache_alias="default", lock_timeout=10):
+        """
+        Parameters:
+            * key: Identifies the token, e.g. a client ID or a username
+            * cache_alias: Name of the cache in Django's CACHES setting
+            * lock_timeout: Seconds after which a refresh lock is
+                            considered abandoned
+        """
+        try:
+            from django.core.cache import caches
+        except ImportError:
+            raise ImportError("DjangoCacheHandler requires Django: pip install django")
+        self._caches = caches
+        self.cache_alias = cache_alias
+        self.key = "spotipy-token:{}".format(key)
+        self.lock_timeout = lock_timeout
+        self._token_info = None
+
+    @property
+    def _cache(self):
+        # Django cache connections are per thread
+        return self._caches[self.cache_alias]
+
+    def get_cached_token(self):
+        token_info = self._token_info
+        if token_info is not None and (
+            token_info["expires_at"] - time.time() >= EXPIRY_MARGIN
+        ):
+            return token_info
+        token_info = self._cache.get(self.key)
+        if token_info is not None:
+            self._token_info = token_info
+        return token_info
+
+    def save_token_to_cache(self, token_info):
+        self._token_info = token_info
+        if token_info.get("refresh_token"):
+            timeout = None
+        else:
+            timeout = max(int(token_info["expires_at"] - time.time()), 1)
+        self._cache.set(self.key, token_info, timeout=timeout)
+
+    @contextlib.contextmanager
+    def refresh_lock(self):
+        cache = self._cache
+        lock_key = self.key + ":lock"
+        owner = uuid.uuid4().hex
+        give_up_at = time.monotonic() + self.lock_timeout
+        while not cache.add(lock_key, owner, timeout=self.lock_timeout):
+            if time.monotonic() >= give_up_at:
+                logger.warning("Refresh lock %s abandoned, refreshing anyway", lock_key)
+                owner = None
+                break
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if owner is not None and cache.get(lock_key) == owner:
+                cache.delete(lock_key)
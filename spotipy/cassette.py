@@ -0,0 +1,186 @@
+""" Recording and replaying of Web API traffic """
+
+__all__ = [
+    "Cassette",
+    "CassetteMiss",
+    "RecordingAdapter",
+    "ReplayAdapter",
+    "record_session",
+    "replay_session",
+]
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# the only response headers the client looks at
+RECORDED_HEADERS = ["Content-Type", "ETag", "Cache-Control", "Retry-After"]
+# never write credentials to a cassette
+REDACTED_FIELDS = ["access_token", "refresh_token"]
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised when replaying a request that wasn't recorded"""
+
+
+def cassette_key(method, url):
+    """Identify a request by its method, URL and sorted query parameters"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return "{} {}".format(method, urlunsplit(parts._replace(query=query)))
+
+
+class Cassette:
+    """
+    Responses recorded by request, kept in a JSON file (gzipped if `path`
+    ends with `.gz`).
+
+    A request made several times replays its responses in the order they
+    were recorded, then keeps replaying the last one.
+    """
+
+    def __init__(self, path=None):
+        """
+        Parameters:
+            * path: File the cassette is loaded from if it exists, and
+                    saved to
+        """
+        self.path = path
+        self.interactions = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if self.path.endswith(".gz"):
+            data = gzip.decompress(data)
+        with self._lock:
+            self.interactions = json.loads(data)["interactions"]
+            self._positions = {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({"version": 1, "interactions": self.interactions})
+        data = data.encode("utf-8")
+        if self.path.endswith(".gz"):
+            data = gzip.compress(data)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def record(self, method, url, response):
+        body = response.content.decode(response.encoding or "utf-8")
+        if any(field in body for field in REDACTED_FIELDS):
+            body = _redact(body)
+        interaction = {
+            "status": response.status_code,
+            "headers": {
+                name: response.headers[name]
+                for name in RECORDED_HEADERS
+                if name in response.headers
+            },
+            "body": body,
+        }
+        with self._lock:
+            self.interactions.setdefault(cassette_key(method, url), []).append(
+                interaction
+            )
+
+    def play(self, method, url):
+        """Return the next recorded interaction for a request, or None"""
+        key = cassette_key(method, url)
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return recorded[min(position, len(recorded) - 1)]
+
+
+def _redact(body):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if isinstance(data, dict):
+        for field in REDACTED_FIELDS:
+            if field in data:
+                data[field] = "REDACTED"
+    return json.dumps(data)
+
+
+class RecordingAdapter(BaseAdapter):
+    """Sends requests through another adapter and records the responses"""
+
+    def __init__(self, cassette, adapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.record(request.method, request.url, response)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Answers requests from a cassette without any network access, optionally
+    waiting `latency` seconds to simulate the real API.
+    """
+
+    def __init__(self, cassette, latency=0):
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+
+    def send(self, request, **kwargs):
+        interaction = self.cassette.play(request.method, request.url)
+        if interaction is None:
+            raise CassetteMiss(
+                "No recorded response for {} {}".format(request.method, request.url),
+                request=request,
+            )
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = interaction["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def record_session(session, cassette):
+    """Record every response received by a Requests session"""
+    for prefix, adapter in list(session.adapters.items()):
+        session.mount(prefix, RecordingAdapter(cassette, adapter))
+
+
+def replay_session(session, cassette, latency=0):
+    """Answer every request made by a Requests session from a cassette"""
+    for prefix in list(session.adapters):
+        session.mount(prefix, ReplayAdapter(cassette, latency))
@@ -1,19 +1,122 @@
 """ A simple and thin Python library for the Spotify Web API """
 
-__all__ = ["Spotify", "SpotifyException"]
+__all__ = ["Spotify", "SpotifyException", "build_session", "session_pool_stats"]
 
-import json
+import concurrent.futures
+import hashlib
 import logging
+import time
 import warnings
+from urllib.parse import urlencode
 
 import requests
 import six
 import urllib3
 
-from spotipy.exceptions import SpotifyException
+from spotipy.deadline import (
+    DeadlineRetry,
+    check_deadline,
+    deadline_timeout,
+    remaining_time,
+)
+from spotipy.exceptions import SpotifyException, SpotifyTimeoutError
+from spotipy.hedging import hedging_enabled
+from spotipy.http2 import HTTP2Adapter
+from spotipy.http_cache import CacheEntry
+from spotipy.json_codec import StdlibJSONCodec
+from spotipy.metrics import RequestEvent, endpoint_template, is_recording, record_event
+from spotipy.oauth2 import SpotifyClientCredentials
+from spotipy.util import chunked, imap_bounded, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RETRY_CODES = (429, 500, 502, 503, 504)
+
+
+def build_session(
+    retries=3,
+    status_retries=3,
+    backoff_factor=0.3,
+    status_forcelist=DEFAULT_RETRY_CODES,
+    pool_connections=10,
+    pool_maxsize=10,
+    pool_block=False,
+    http2=False,
+):
+    """
+    Build a Requests session with retries and a bounded connection pool.
+
+    Parameters:
+        - retries - total number of retries to allow
+        - status_retries - number of times to retry on bad status codes
+        - backoff_factor - a backoff factor to apply between attempts
+        - status_forcelist - status codes retries should occur on
+        - pool_connections - number of hosts to keep a connection pool for
+        - pool_maxsize - maximum number of connections kept alive per host
+        - pool_block - wait for a free connection when the pool is exhausted,
+                       instead of opening a connection that won't be kept
+        - http2 - multiplex requests over HTTP/2 connections (at most
+                  `pool_maxsize` per host) with an HTTP2Adapter
+    """
+    session = requests.Session()
+    # gives up early rather than retry past the current deadline
+    retry = DeadlineRetry(
+        total=retries,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=status_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+    )
+
+    if http2:
+        adapter = HTTP2Adapter(max_retries=retry, max_connections=pool_maxsize)
+    else:
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=retry,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _urllib3_retries(response):
+    """Number of retries urllib3 made before getting `response`"""
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
+def session_pool_stats(session):
+    """
+    Return usage statistics for each host connection pool of a session
+    built with `build_session`.
+    """
+    stats = []
+    adapter = session.get_adapter("https://")
+    # look through a cassette's RecordingAdapter
+    adapter = getattr(adapter, "adapter", adapter)
+    if not hasattr(adapter, "poolmanager"):
+        return stats
+    pools = adapter.poolmanager.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        stats.append(
+            {
+                "host": pool.host,
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
+                "available": pool.pool.qsize() if pool.pool else 0,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        )
+    return stats
+
 
 class Spotify:
     """
@@ -32,7 +135,7 @@ class Spotify:
     """
 
     max_retries = 3
-    default_retry_codes = (429, 500, 502, 503, 504)
+    default_retry_codes = DEFAULT_RETRY_CODES
     country_codes = [
         "AD",
         "AR",
@@ -110,6 +213,17 @@ class Spotify:
         status_retries=max_retries,
         backoff_factor=0.3,
         language=None,
+        rate_limiter=None,
+        http_cache=None,
+        single_flight=None,
+        max_workers=4,
+        concurrency_limiter=None,
+        circuit_breaker=None,
+        metrics=None,
+        json_codec=None,
+        tracer=None,
+        hedging=None,
+        cache_identity=None,
     ):
         """
         Creates a Spotify API client.
@@ -120,6 +234,8 @@ class Spotify:
             A falsy value disables sessions.
             It should generally be a good idea to keep sessions enabled
             for performance reasons (connection pooling).
+            A session passed in can be shared with other clients: it is
+            left open when this client is freed.
         :param client_credentials_manager:
             SpotifyClientCredentials object
         :param oauth_manager:
@@ -145,6 +261,46 @@ class Spotify:
         :param language:
             The language parameter advertises what language the user prefers to see.
             See ISO-639 language code: https://www.loc.gov/standards/iso639-2/php/code_list.php
+        :param rate_limiter:
+            A RateLimiter shared with other clients of the same app (optional).
+            Each request waits for a token from it, and 429 responses pause
+            it for the `Retry-After` delay instead of being retried blindly.
+        :param http_cache:
+            An HTTPCache used to store GET responses with their `ETag` (optional).
+            Stale entries are revalidated with `If-None-Match`, and a 304
+            response returns the cached body.
+        :param single_flight:
+            A SingleFlight shared with other clients (optional). Concurrent
+            GET requests with the same URL, params and authorization then
+            share the result of a single request.
+        :param max_workers:
+            Maximum number of concurrent requests made by methods that split
+            their work into several requests, like the `*_bulk` lookups
+        :param concurrency_limiter:
+            An AdaptiveConcurrencyLimiter shared with other clients (optional).
+            It caps the number of requests in flight, backing off when
+            Spotify throttles, fails or slows down.
+        :param circuit_breaker:
+            A CircuitBreaker shared with other clients (optional). While it
+            is open, requests fail straight away with a SpotifyException.
+        :param metrics:
+            A MetricsSink receiving a RequestEvent for each request (optional).
+        :param json_codec:
+            A JSONCodec encoding request bodies and decoding responses,
+            e.g. an OrjsonCodec (optional, the json module by default).
+        :param tracer:
+            A RequestTracer logging a sample of the requests and responses
+            (optional). Without one, requests aren't logged.
+        :param hedging:
+            A HedgingPolicy shared with other clients (optional). GET
+            requests made within `hedged_requests()` are then sent again
+            when their response is slower than usual, and the first
+            response is used.
+        :param cache_identity:
+            Whose data the responses are, e.g. `user:{spotify_id}` for a
+            user's access token (optional). Cached and shared responses are
+            keyed on it rather than on the token, so they survive token
+            refreshes. Client-credentials clients use their client ID.
         """
         self.prefix = "https://api.spotify.com/v1/"
         self._auth = auth
@@ -158,12 +314,25 @@ class Spotify:
         self.retries = retries
         self.status_retries = status_retries
         self.language = language
-
+        self.rate_limiter = rate_limiter
+        self.http_cache = http_cache
+        self.single_flight = single_flight
+        self.max_workers = max_workers
+        self.concurrency_limiter = concurrency_limiter
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+        self.json_codec = json_codec or StdlibJSONCodec()
+        self.tracer = tracer
+        self.hedging = hedging
+        self.cache_identity = cache_identity
+
+        self._owns_session = False
         if isinstance(requests_session, requests.Session):
             self._session = requests_session
         else:
             if requests_session:  # Build a new session.
                 self._build_session()
+                self._owns_session = True
             else:  # Use the Requests API module as a "session".
                 self._session = requests.api
 
@@ -183,25 +352,23 @@ class Spotify:
 
     def __del__(self):
         """Make sure the connection (pool) gets closed"""
-        if isinstance(self._session, requests.Session):
+        if getattr(self, "_owns_session", False) and isinstance(
+            self._session, requests.Session
+        ):
             self._session.close()
 
     def _build_session(self):
-        self._session = requests.Session()
-        retry = urllib3.Retry(
-            total=self.retries,
-            connect=None,
-            read=False,
-            allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
-            status=self.status_retries,
+        status_forcelist = self.status_forcelist
+        if self.rate_limiter is not None:
+            # 429s are handled by the shared rate limiter in _send
+            status_forcelist = [code for code in status_forcelist if code != 429]
+        self._session = build_session(
+            retries=self.retries,
+            status_retries=self.status_retries,
             backoff_factor=self.backoff_factor,
-            status_forcelist=self.status_forcelist,
+            status_forcelist=status_forcelist,
         )
 
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-        self._session.mount("http://", adapter)
-        self._session.mount("https://", adapter)
-
     def _auth_headers(self):
         if self._auth:
             return {"Authorization": f"Bearer {self._auth}"}
@@ -213,11 +380,10 @@ class Spotify:
             token = self.auth_manager.get_access_token()
         return {"Authorization": f"Bearer {token}"}
 
-    def _internal_call(self, method, url, payload, params):
+    def _prepare_request(self, method, url, payload, params, headers):
         args = dict(params=params)
         if not url.startswith("http"):
             url = self.prefix + url
-        headers = self._auth_headers()
 
         if "content_type" in args["params"]:
             headers["Content-Type"] = args["params"]["content_type"]
@@ -227,46 +393,238 @@ class Spotify:
         else:
             headers["Content-Type"] = "application/json"
             if payload:
-                args["data"] = json.dumps(payload)
+                args["data"] = self.json_codec.dumps(payload)
 
         if self.language is not None:
             headers["Accept-Language"] = self.language
+        return url, headers, args
 
-        logger.debug(
-            "Sending %s to %s with Params: %s Headers: %s and Body: %r ",
-            method,
-            url,
-            args.get("params"),
-            headers,
-            args.get("data"),
-        )
+    @staticmethod
+    def _error_details(response):
+        try:
+            json_response = response.json()
+            error = json_response.get("error", {})
+            msg = error.get("message")
+            reason = error.get("reason")
+        except ValueError:
+            # if the response cannnot be decoded into JSON (which raises a ValueError),
+            # then try to decode it into text
+
+            # if we receive an empty string (which is falsy), then replace it with `None`
+            msg = response.text or None
+            reason = None
+        return msg, reason
+
+    def _acquire_rate_limit(self):
+        if self.rate_limiter is None:
+            return
+        if not self.rate_limiter.acquire(timeout=remaining_time()):
+            raise SpotifyTimeoutError("Deadline exceeded waiting for rate limit")
+
+    def _send(self, method, url, headers, args):
+        attempt = 0
+        while True:
+            self._acquire_rate_limit()
 
+            if method == "GET" and self.hedging is not None and hedging_enabled():
+                response = self._hedged_request(method, url, headers, args)
+            else:
+                response = self._guarded_request(method, url, headers, args)
+
+            if (
+                response.status_code != 429
+                or self.rate_limiter is None
+                or attempt >= self.status_retries
+            ):
+                return response, attempt + _urllib3_retries(response)
+
+            attempt += 1
+            delay = parse_retry_after(
+                response.headers, self.backoff_factor * (2 ** attempt)
+            )
+            self.rate_limiter.pause(delay)
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                raise SpotifyTimeoutError("Deadline exceeded waiting for rate limit")
+
+    def _guarded_request(self, method, url, headers, args):
+        """
+        Make a request through the circuit breaker and concurrency limiter,
+        within the current deadline
+        """
+        timeout = deadline_timeout(self.requests_timeout)
+        if self.concurrency_limiter is not None:
+            if not self.concurrency_limiter.acquire(timeout=remaining_time()):
+                raise SpotifyTimeoutError("Deadline exceeded waiting to send request")
+        if self.circuit_breaker is not None:
+            try:
+                self.circuit_breaker.before_call()
+            except SpotifyException:
+                if self.concurrency_limiter is not None:
+                    self.concurrency_limiter.cancel()
+                raise
+
+        status = None
+        # by the caller's deadline, which says nothing about Spotify's health
+        cut_short = False
+        start = time.monotonic()
         try:
             response = self._session.request(
                 method,
                 url,
                 headers=headers,
                 proxies=self.proxies,
-                timeout=self.requests_timeout,
+                timeout=timeout,
                 **args,
             )
+            status = response.status_code
+            if self.hedging is not None and method == "GET" and status < 500:
+                latency = time.monotonic() - start
+                self.hedging.observe(url, latency, args.get("params"))
+            return response
+        except requests.exceptions.RequestException as error:
+            reason = getattr(error.args[0] if error.args else None, "reason", None)
+            if isinstance(reason, SpotifyTimeoutError):
+                cut_short = True
+                raise reason from error
+            # the timeout may have been cut short by the deadline
+            try:
+                check_deadline()
+            except SpotifyTimeoutError:
+                cut_short = True
+                raise
+            raise
+        finally:
+            if cut_short:
+                if self.concurrency_limiter is not None:
+                    self.concurrency_limiter.cancel()
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.cancel()
+            else:
+                # `status` stays None if no response came back
+                if self.concurrency_limiter is not None:
+                    self.concurrency_limiter.release(time.monotonic() - start, status)
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record(status)
+
+    def _hedged_request(self, method, url, headers, args):
+        """
+        Make a request, sending it again if no response has come back
+        within the hedging policy's delay, and return the first response
+        """
+        delay = self.hedging.hedge_delay(url, args["params"])
+        remaining = remaining_time()
+        if delay is None or (remaining is not None and delay >= remaining):
+            return self._guarded_request(method, url, headers, args)
+
+        def hedge_request():
+            self._acquire_rate_limit()
+            return self._guarded_request(method, url, headers, args)
+
+        original = self.hedging.submit(
+            self._guarded_request, method, url, headers, args
+        )
+        if original is None:
+            # every hedging thread is busy
+            return self._guarded_request(method, url, headers, args)
+
+        # the losing request is left to finish in the background
+        pending = {original}
+        done, _ = concurrent.futures.wait(pending, timeout=delay)
+        if not done and self.hedging.try_hedge():
+            hedge = self.hedging.submit(hedge_request)
+            if hedge is not None:
+                pending.add(hedge)
+
+        while True:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is not original:
+                        self.hedging.record_win()
+                    return future.result()
+            if not pending:
+                raise error
+            # the other request may still succeed
+
+    def _identity(self, headers):
+        if self.cache_identity is not None:
+            return self.cache_identity
+        if not self._auth and isinstance(self.auth_manager, SpotifyClientCredentials):
+            return "app:{}".format(self.auth_manager.client_id)
+        # nothing better to tell users apart
+        return headers.get("Authorization", "")
+
+    def _request_key(self, url, params, headers):
+        query = urlencode(sorted((k, v) for k, v in params.items() if v is not None))
+        # responses can differ between users, so keep them apart
+        identity = self._identity(headers).encode()
+        return "{} {} {}?{}".format(
+            hashlib.sha256(identity).hexdigest(), self.language, url, query
+        )
+
+    def _decode(self, body, raw=False):
+        return body if raw else self.json_codec.loads(body)
 
+    def _internal_call(self, method, url, payload, params, raw=False):
+        url, headers, args = self._prepare_request(
+            method, url, payload, params, self._auth_headers()
+        )
+
+        if method == "GET" and self.single_flight is not None:
+            key = self._request_key(url, args["params"], headers)
+            if raw:
+                key += " raw"
+            return self.single_flight.do(
+                key, lambda: self._request(method, url, headers, args, raw)
+            )
+        return self._request(method, url, headers, args, raw)
+
+    def _request(self, method, url, headers, args, raw=False):
+        cache_key = cached = None
+        if method == "GET" and self.http_cache is not None:
+            cache_key = self._request_key(url, args["params"], headers)
+            cached = self.http_cache.get(cache_key)
+            if cached is not None:
+                if cached.is_fresh():
+                    logger.debug("Using cached response for %s", url)
+                    return self._decode(cached.body, raw)
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+
+        response = None
+        retries = 0
+        decode_time = 0
+        traced = self.tracer is not None and self.tracer.sample()
+        start = time.monotonic()
+        try:
+            response, retries = self._send(method, url, headers, args)
             response.raise_for_status()
-            results = response.json()
+            if response.status_code == 304 and cached is not None:
+                logger.debug("Cached response for %s is still valid", url)
+                entry = CacheEntry.from_response(response, cached.body)
+                if entry is not None:
+                    etag = entry.etag or cached.etag
+                    self.http_cache.set(cache_key, entry._replace(etag=etag))
+                decode_start = time.monotonic()
+                results = self._decode(cached.body, raw)
+                decode_time = time.monotonic() - decode_start
+            else:
+                decode_start = time.monotonic()
+                try:
+                    results = self._decode(response.content, raw)
+                finally:
+                    decode_time = time.monotonic() - decode_start
+                if cache_key is not None:
+                    entry = CacheEntry.from_response(response)
+                    if entry is not None:
+                        self.http_cache.set(cache_key, entry)
         except requests.exceptions.HTTPError as http_error:
             response = http_error.response
-            try:
-                json_response = response.json()
-                error = json_response.get("error", {})
-                msg = error.get("message")
-                reason = error.get("reason")
-            except ValueError:
-                # if the response cannnot be decoded into JSON (which raises a ValueError),
-                # then try to decode it into text
-
-                # if we receive an empty string (which is falsy), then replace it with `None`
-                msg = response.text or None
-                reason = None
+            msg, reason = self._error_details(response)
 
             logger.error(
                 "HTTP Error for %s to %s with Params: %s returned %s due to %s",
@@ -299,15 +657,35 @@ class Spotify:
             )
         except ValueError:
             results = None
+        finally:
+            if is_recording(self.metrics):
+                latency = time.monotonic() - start
+                self._record_request(
+                    method, url, response, latency, retries, decode_time
+                )
+            if traced:
+                latency = time.monotonic() - start
+                self.tracer.trace(method, url, args, headers, response, latency)
 
-        logger.debug("RESULTS: %s", results)
         return results
 
-    def _get(self, url, args=None, payload=None, **kwargs):
+    def _record_request(self, method, url, response, latency, retries, decode_time):
+        event = RequestEvent(
+            endpoint=endpoint_template(url),
+            method=method,
+            status=None if response is None else response.status_code,
+            latency=latency - decode_time,
+            retries=retries,
+            response_bytes=0 if response is None else len(response.content),
+            decode_time=decode_time,
+        )
+        record_event(self.metrics, event)
+
+    def _get(self, url, args=None, payload=None, raw=False, **kwargs):
         if args:
             kwargs.update(args)
 
-        return self._internal_call("GET", url, payload, kwargs)
+        return self._internal_call("GET", url, payload, kwargs, raw)
 
     def _post(self, url, args=None, payload=None, **kwargs):
         if args:
@@ -324,25 +702,27 @@ class Spotify:
             kwargs.update(args)
         return self._internal_call("PUT", url, payload, kwargs)
 
-    def next(self, result):
+    def next(self, result, raw=False):
         """returns the next result given a paged result
 
         Parameters:
             - result - a previously returned paged result
+            - raw - return the undecoded JSON response body, as bytes
         """
         if result["next"]:
-            return self._get(result["next"])
+            return self._get(result["next"], raw=raw)
         else:
             return None
 
-    def previous(self, result):
+    def previous(self, result, raw=False):
         """returns the previous result given a paged result
 
         Parameters:
             - result - a previously returned paged result
+            - raw - return the undecoded JSON response body, as bytes
         """
         if result["previous"]:
-            return self._get(result["previous"])
+            return self._get(result["previous"], raw=raw)
         else:
             return None
 
@@ -548,6 +928,74 @@ class Spotify:
         tlist = [self._get_id("episode", e) for e in episodes]
         return self._get("episodes/?ids=" + ",".join(tlist), market=market)
 
+    def _bulk_lookup(self, lookup, type, ids, batch_size, **kwargs):
+        id_list = [self._get_id(type, i) for i in ids]
+        batches = chunked(dict.fromkeys(id_list), batch_size)
+        key = type + "s"
+
+        found = {}
+        responses = imap_bounded(
+            lambda batch: lookup(batch, **kwargs), batches, self.max_workers
+        )
+        for batch, response in zip(batches, responses):
+            found.update(zip(batch, response[key]))
+        return [found.get(i) for i in id_list]
+
+    def tracks_bulk(self, tracks, market=None):
+        """returns a list of tracks given any number of track IDs, URIs, or URLs
+
+        The IDs are de-duplicated and requested concurrently in batches of 50.
+        The result is aligned with `tracks`: repeated IDs share the same object
+        and unknown IDs give None.
+
+        Parameters:
+            - tracks - a list of spotify URIs, URLs or IDs
+            - market - an ISO 3166-1 alpha-2 country code.
+        """
+        return self._bulk_lookup(self.tracks, "track", tracks, 50, market=market)
+
+    def artists_bulk(self, artists):
+        """returns a list of artists given any number of artist IDs, URIs, or URLs
+
+        See `tracks_bulk`. Artists are requested in batches of 50.
+
+        Parameters:
+            - artists - a list of artist IDs, URIs or URLs
+        """
+        return self._bulk_lookup(self.artists, "artist", artists, 50)
+
+    def albums_bulk(self, albums):
+        """returns a list of albums given any number of album IDs, URIs, or URLs
+
+        See `tracks_bulk`. Albums are requested in batches of 20.
+
+        Parameters:
+            - albums - a list of album IDs, URIs or URLs
+        """
+        return self._bulk_lookup(self.albums, "album", albums, 20)
+
+    def shows_bulk(self, shows, market=None):
+        """returns a list of shows given any number of show IDs, URIs, or URLs
+
+        See `tracks_bulk`. Shows are requested in batches of 50.
+
+        Parameters:
+            - shows - a list of show IDs, URIs or URLs
+            - market - an ISO 3166-1 alpha-2 country code.
+        """
+        return self._bulk_lookup(self.shows, "show", shows, 50, market=market)
+
+    def episodes_bulk(self, episodes, market=None):
+        """returns a list of episodes given any number of episode IDs, URIs, or URLs
+
+        See `tracks_bulk`. Episodes are requested in batches of 50.
+
+        Parameters:
+            - episodes - a list of episode IDs, URIs or URLs
+            - market - an ISO 3166-1 alpha-2 country code.
+        """
+        return self._bulk_lookup(self.episodes, "episode", episodes, 50, market=market)
+
     def search(self, q, limit=10, offset=0, type="track", market=None):
         """searches for an item
 
@@ -675,6 +1123,7 @@ class Spotify:
         offset=0,
         market=None,
         additional_types=("track", "episode"),
+        raw=False,
     ):
         """Get full details of the tracks and episodes of a playlist.
 
@@ -686,10 +1135,13 @@ class Spotify:
             - market - an ISO 3166-1 alpha-2 country code.
             - additional_types - list of item types to return.
                                  valid types are: track and episode
+            - raw - return the undecoded JSON response body, as bytes,
+                    e.g. to store it or parse it with a streaming parser
         """
         plid = self._get_id("playlist", playlist_id)
         return self._get(
             "playlists/%s/tracks" % (plid),
+            raw=raw,
             limit=limit,
             offset=offset,
             fields=fields,
@@ -1801,7 +2253,7 @@ class Spotify:
         if state not in ["track", "context", "off"]:
             logger.warning("Invalid state")
             return
-        self._put(
+        return self._put(
             self._append_device_id("me/player/repeat?state=%s" % state, device_id)
         )
 
@@ -1818,7 +2270,7 @@ class Spotify:
         if volume_percent < 0 or volume_percent > 100:
             logger.warning("Volume must be between 0 and 100, inclusive")
             return
-        self._put(
+        return self._put(
             self._append_device_id(
                 "me/player/volume?volume_percent=%s" % volume_percent,
                 device_id,
@@ -1836,7 +2288,7 @@ class Spotify:
             logger.warning("state must be a boolean")
             return
         state = str(state).lower()
-        self._put(
+        return self._put(
             self._append_device_id("me/player/shuffle?state=%s" % state, device_id)
         )
 
@@ -1924,19 +2376,38 @@ class Spotify:
         results = {}
         first_type = type.split(",")[0] + "s"
         count = 0
-
-        for country in markets:
-            result = self._get(
-                "search", q=q, limit=limit, offset=offset, type=type, market=country
+        # read by the searches when they start, so markets searched after
+        # results came in don't ask for more items than needed
+        budget = {"limit": limit}
+
+        def search(country):
+            return self._get(
+                "search",
+                q=q,
+                limit=budget["limit"],
+                offset=offset,
+                type=type,
+                market=country,
             )
-            results[country] = result
-
-            count += len(result[first_type]["items"])
-            if total and count >= total:
-                break
-            if total and limit > total - count:
-                # when approaching `total` results, adjust `limit` to not request more
-                # items than needed
-                limit = total - count
+
+        searches = imap_bounded(search, markets, self.max_workers)
+        try:
+            for country, result in zip(markets, searches):
+                items = result[first_type]["items"]
+                if total and count + len(items) > total:
+                    # concurrent searches may overshoot `total`
+                    del items[total - count :]
+                results[country] = result
+
+                count += len(items)
+                if total and count >= total:
+                    break
+                if total and budget["limit"] > total - count:
+                    # when approaching `total` results, adjust `limit` to not
+                    # request more items than needed
+                    budget["limit"] = total - count
+        finally:
+            # skip the markets that haven't been searched yet
+            searches.close()
 
         return results
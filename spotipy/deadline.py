@@ -0,0 +1,109 @@
+""" Deadlines spanning several Web API calls """
+
+__all__ = ["Deadline", "deadline", "remaining_time"]
+
+import contextlib
+import contextvars
+import time
+
+import urllib3
+
+from spotipy.exceptions import SpotifyTimeoutError
+
+
+class Deadline:
+    """A point in time after which no more requests should be made"""
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+_current_deadline = contextvars.ContextVar("spotipy_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """
+    Give the Web API calls made in this context, retries and backoff
+    included, `seconds` to complete. Once it is spent, calls raise a
+    SpotifyTimeoutError instead of being sent.
+
+    The deadline follows the context into the worker threads of paginated
+    and bulk fetches. A nested deadline can't extend the one around it.
+
+        with deadline(5):
+            playlist.check_update()
+    """
+    new = Deadline(seconds)
+    current = _current_deadline.get()
+    if current is not None and current.expires_at < new.expires_at:
+        new = current
+    token = _current_deadline.set(new)
+    try:
+        yield new
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_time():
+    """Seconds left before the current deadline, or None if there is none"""
+    current = _current_deadline.get()
+    return None if current is None else current.remaining()
+
+
+def check_deadline():
+    """Raise a SpotifyTimeoutError if the current deadline has passed"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise SpotifyTimeoutError()
+
+
+def deadline_timeout(timeout):
+    """Cap a request timeout to the time left before the current deadline"""
+    check_deadline()
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        # (connect, read) timeouts
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    if timeout is None:
+        return remaining
+    return min(timeout, remaining)
+
+
+class DeadlineRetry(urllib3.Retry):
+    """
+    urllib3 retry configuration that gives up once a retry, backoff
+    included, can't finish before the current deadline
+    """
+
+    def increment(
+        self,
+        method=None,
+        url=None,
+        response=None,
+        error=None,
+        _pool=None,
+        _stacktrace=None,
+    ):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        remaining = remaining_time()
+        if remaining is not None:
+            backoff = retry.get_backoff_time()
+            if response is not None and retry.respect_retry_after_header:
+                backoff = max(backoff, retry.get_retry_after(response) or 0)
+            if backoff >= remaining:
+                # MaxRetryError lets urllib3 release the connection, the
+                # client raises its reason
+                raise urllib3.exceptions.MaxRetryError(
+                    _pool, url, SpotifyTimeoutError()
+                )
+        return retry
@@ -14,3 +14,10 @@ class SpotifyException(Exception):
         return "http status: {}, code:{} - {}, reason: {}".format(
             self.http_status, self.code, self.msg, self.reason
         )
+
+
+class SpotifyTimeoutError(SpotifyException):
+    """Raised when a call can't be made before the current deadline"""
+
+    def __init__(self, msg="Deadline exceeded"):
+        super().__init__(504, -1, msg, reason="DEADLINE_EXCEEDED")
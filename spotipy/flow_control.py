@@ -0,0 +1,164 @@
+""" Adaptive concurrency limiting and circuit breaking for Web API calls """
+
+__all__ = ["AdaptiveConcurrencyLimiter", "CircuitBreaker"]
+
+import logging
+import threading
+import time
+
+from spotipy.exceptions import SpotifyException
+
+logger = logging.getLogger(__name__)
+
+
+def _is_overloaded(status):
+    """`status` is None when no response was received at all"""
+    return status is None or status == 429 or status >= 500
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of requests in flight with a window that adapts to
+    how Spotify is coping, AIMD-style: the window grows by about one request
+    per window's worth of healthy responses, and is cut by `backoff_ratio`
+    when a request is throttled (429), fails (5xx, no response) or is slower
+    than `latency_target`.
+    """
+
+    def __init__(
+        self,
+        initial_limit=8,
+        min_limit=1,
+        max_limit=64,
+        latency_target=2.0,
+        backoff_ratio=0.5,
+    ):
+        """
+        Parameters:
+             * initial_limit: Number of concurrent requests allowed at first
+             * min_limit: The window never shrinks below this
+             * max_limit: The window never grows above this
+             * latency_target: Responses slower than this many seconds are
+                               treated as a sign of overload
+             * backoff_ratio: Factor the window is multiplied by on overload
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._last_decrease = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Block until the window has room for one more request, or for at
+        most `timeout` seconds. Return whether the request can be made.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.in_flight < int(self.limit), timeout
+            ):
+                return False
+            self.in_flight += 1
+            return True
+
+    def cancel(self):
+        """Give back a slot taken with `acquire` without making a request"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def release(self, latency, status):
+        """Record the outcome of a request started with `acquire`"""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if _is_overloaded(status) or latency > self.latency_target:
+                # requests that were already in flight when the trouble
+                # started shouldn't shrink the window again
+                if now - self._last_decrease > self.latency_target:
+                    self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                    self._last_decrease = now
+                    logger.info("Reduced Spotify concurrency to %d", self.limit)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Stops calls to Spotify while it is degraded.
+
+    After `failure_threshold` consecutive failures (5xx or no response) the
+    circuit opens and calls fail straight away with a SpotifyException
+    instead of waiting on timeouts and retries. After `recovery_timeout`
+    seconds a single trial call is let through: the circuit closes if it
+    succeeds and opens again if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30):
+        """
+        Parameters:
+             * failure_threshold: Number of consecutive failures that open
+                                  the circuit
+             * recovery_timeout: Number of seconds to wait before trying
+                                 a call again once the circuit is open
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise a SpotifyException if calls shouldn't be made right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    raise self._open_error()
+                self.state = self.HALF_OPEN
+            if self._trial_in_flight:
+                raise self._open_error()
+            self._trial_in_flight = True
+
+    def record(self, status):
+        """Record the outcome of a call allowed by `before_call`"""
+        failed = status is None or status >= 500
+        with self._lock:
+            self._trial_in_flight = False
+            if not failed:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error("Spotify looks degraded, opening the circuit")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def cancel(self):
+        """
+        Forget a call allowed by `before_call` whose outcome says nothing
+        about Spotify's health, e.g. one cut short by the caller's deadline
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open_error(self):
+        return SpotifyException(
+            503,
+            -1,
+            "Spotify is unavailable, not sending the request",
+            reason="CIRCUIT_OPEN",
+        )
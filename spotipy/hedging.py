@@ -0,0 +1,169 @@
+""" Hedged requests, cutting the tail latency of idempotent Web API calls """
+
+__all__ = ["HedgingPolicy", "hedged_requests", "hedging_enabled"]
+
+import collections
+import concurrent.futures
+import contextlib
+import contextvars
+import threading
+from urllib.parse import parse_qsl, urlparse
+
+from spotipy.metrics import _percentile, endpoint_template
+
+
+def _latency_key(url, params=None):
+    """
+    The endpoint of a request and the number of items it asks for, which
+    its latency grows with, e.g. `playlists/{id}/tracks?limit=100`
+    """
+    query = dict(parse_qsl(urlparse(url).query))
+    query.update((k, v) for k, v in (params or {}).items() if v is not None)
+    key = endpoint_template(url)
+    if "limit" in query:
+        key += "?limit={}".format(query["limit"])
+    elif "ids" in query:
+        key += "?ids={}".format(len(str(query["ids"]).split(",")))
+    return key
+
+
+class HedgingPolicy:
+    """
+    Decides when a GET still waiting for its response gets a duplicate
+    request, the first response to arrive being used.
+
+    A request is hedged once it has taken longer than the `percentile`
+    latency of the recent requests to its endpoint asking for as many
+    items (the same `limit` or number of `ids`). Each request made with
+    hedging enabled earns `max_extra` of a hedge, up to `burst` hedges
+    saved, so hedging adds at most `max_extra` (e.g. 5%) more requests.
+
+    Hedged requests are sent from a pool of at most `max_threads` threads
+    shared by the clients using the policy. While they are all busy,
+    requests are sent from the caller's thread without hedging.
+
+    Counters:
+        - requests - requests made with hedging enabled
+        - hedges - duplicate requests sent
+        - wins - duplicate requests answered before the original
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        max_extra=0.05,
+        burst=10,
+        min_samples=20,
+        max_samples=200,
+        min_delay=0.01,
+        max_threads=16,
+    ):
+        """
+        Parameters:
+            * percentile: Latency percentile after which requests are hedged
+            * max_extra: Maximum ratio of hedges to requests
+            * burst: Maximum number of hedges saved up while latencies are low
+            * min_samples: Requests to an endpoint observed before hedging them
+            * max_samples: Recent latencies kept per endpoint
+            * min_delay: Minimum seconds to wait before hedging a request
+            * max_threads: Maximum number of requests sent at once by the
+                           policy's threads
+        """
+        self.percentile = percentile
+        self.max_extra = max_extra
+        self.burst = burst
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.min_delay = min_delay
+        self.max_threads = max_threads
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self._budget = 0
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._idle_threads = threading.BoundedSemaphore(max_threads)
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "wins": self.wins}
+
+    def observe(self, url, latency, params=None):
+        """Learn from the latency of a successful request"""
+        endpoint = _latency_key(url, params)
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = collections.deque(
+                    maxlen=self.max_samples
+                )
+            latencies.append(latency)
+
+    def hedge_delay(self, url, params=None):
+        """
+        Seconds to wait for the response to a request before hedging it,
+        or None while too few requests to its endpoint have been observed
+        """
+        endpoint = _latency_key(url, params)
+        with self._lock:
+            self.requests += 1
+            self._budget = min(self._budget + self.max_extra, self.burst)
+            latencies = self._latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            latencies = sorted(latencies)
+        return max(_percentile(latencies, self.percentile), self.min_delay)
+
+    def try_hedge(self):
+        """Whether the budget allows another hedge, which it is charged for"""
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.wins += 1
+
+    def submit(self, func, *args):
+        """
+        Call `func` on one of the policy's threads, in the caller's context,
+        and return its Future, or None if every thread is busy
+        """
+        if not self._idle_threads.acquire(blocking=False):
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_threads, thread_name_prefix="spotipy-hedging"
+                )
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, func, *args)
+        future.add_done_callback(lambda _: self._idle_threads.release())
+        return future
+
+
+_hedging = contextvars.ContextVar("spotipy_hedging", default=False)
+
+
+@contextlib.contextmanager
+def hedged_requests(enabled=True):
+    """
+    Hedge the GET requests made in this context by clients with a
+    HedgingPolicy, e.g. the calls a page waits for:
+
+        with hedged_requests():
+            playlist.get_latest_snapshot()
+    """
+    token = _hedging.set(enabled)
+    try:
+        yield
+    finally:
+        _hedging.reset(token)
+
+
+def hedging_enabled():
+    return _hedging.get()
@@ -0,0 +1,182 @@
+""" An HTTP/2 transport for Requests sessions, backed by httpx """
+
+__all__ = ["HTTP2Adapter"]
+
+import datetime
+import time
+
+import httpx
+import requests
+import urllib3
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# connection-specific headers, which HTTP/2 forbids
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-connection",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+class _RetryResponse:
+    """The parts of a urllib3 response that urllib3.Retry looks at"""
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self.headers = response.headers
+
+    def get_redirect_location(self):
+        return False
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    A Requests transport adapter multiplexing concurrent requests over a
+    few HTTP/2 connections, instead of one connection per request in flight.
+
+    Mount it on a session, or use `build_session(http2=True)`, to swap it in
+    for the default urllib3 adapter: the clients don't notice the difference.
+    Retries follow the same urllib3.Retry configuration.
+
+    HTTP/2 is negotiated over TLS, so plain `http://` URLs (like the local
+    fake server's) fall back to HTTP/1.1. Proxies aren't supported.
+    """
+
+    def __init__(self, max_retries=None, max_connections=10, client=None):
+        """
+        Parameters:
+            * max_retries: urllib3.Retry configuration (no retries by default)
+            * max_connections: Maximum number of connections per host
+            * client: httpx.Client to use instead of building one
+        """
+        super().__init__()
+        self.max_retries = max_retries or urllib3.Retry(0, read=False)
+        self.client = client or httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        if proxies and any(proxies.values()):
+            raise ValueError("HTTP2Adapter doesn't support proxies")
+
+        headers = {
+            name: value
+            for name, value in request.headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+        retry = self.max_retries
+        start = time.monotonic()
+        while True:
+            try:
+                response = self.client.request(
+                    request.method,
+                    request.url,
+                    headers=headers,
+                    content=request.body,
+                    timeout=_httpx_timeout(timeout),
+                )
+            except httpx.TransportError as error:
+                retry = self._increment(retry, request, error=error)
+                retry.sleep()
+                continue
+
+            retry_response = _RetryResponse(response)
+            if not retry.is_retry(
+                request.method,
+                response.status_code,
+                "Retry-After" in response.headers,
+            ):
+                break
+            try:
+                retry = retry.increment(
+                    request.method, request.url, response=retry_response
+                )
+            except urllib3.exceptions.MaxRetryError as error:
+                if retry.raise_on_status:
+                    raise requests.exceptions.RetryError(error, request=request)
+                break
+            retry.sleep(retry_response)
+
+        return self._build_response(request, response, retry, start)
+
+    def _increment(self, retry, request, error):
+        urllib3_error = _urllib3_error(error, request.url)
+        try:
+            return retry.increment(request.method, request.url, error=urllib3_error)
+        except urllib3.exceptions.MaxRetryError as max_retry_error:
+            if max_retry_error.reason is not urllib3_error:
+                # e.g. given up because of the deadline
+                raise requests.exceptions.ConnectionError(
+                    max_retry_error, request=request
+                )
+            cause = max_retry_error
+        except urllib3.exceptions.HTTPError as not_retried:
+            # read errors aren't retried unless the Retry allows it, as the
+            # server may have acted on the request
+            cause = not_retried
+        if isinstance(
+            urllib3_error, urllib3.exceptions.ConnectTimeoutError
+        ) and not isinstance(urllib3_error, urllib3.exceptions.NewConnectionError):
+            raise requests.exceptions.ConnectTimeout(cause, request=request)
+        if isinstance(urllib3_error, urllib3.exceptions.ReadTimeoutError):
+            raise requests.exceptions.ReadTimeout(cause, request=request)
+        raise requests.exceptions.ConnectionError(cause, request=request)
+
+    def _build_response(self, request, response, retry, start):
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.headers = CaseInsensitiveDict(response.headers)
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.reason = response.reason_phrase
+        result._content = response.content
+        result.url = request.url
+        result.request = request
+        result.connection = self
+        result.elapsed = datetime.timedelta(seconds=time.monotonic() - start)
+        # lets the client count the retries made, like with urllib3
+        result.raw = _RawResponse(retry, response.http_version)
+        return result
+
+    def close(self):
+        self.client.close()
+
+
+class _RawResponse:
+    def __init__(self, retries, http_version):
+        self.retries = retries
+        self.version_string = http_version
+
+
+def _urllib3_error(error, url):
+    """
+    The urllib3 counterpart of an httpx error, so that urllib3.Retry tells
+    connection errors (never sent, always safe to retry) from read errors
+    """
+    message = str(error)
+    if isinstance(error, (httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return urllib3.exceptions.ConnectTimeoutError(message)
+    if isinstance(error, httpx.ConnectError):
+        return urllib3.exceptions.NewConnectionError(None, message)
+    if isinstance(error, httpx.TimeoutException):
+        # read and write timeouts
+        return urllib3.exceptions.ReadTimeoutError(None, url, message)
+    if isinstance(error, (httpx.NetworkError, httpx.ProtocolError)):
+        return urllib3.exceptions.ProtocolError(message, error)
+    return urllib3.exceptions.HTTPError(message)
+
+
+def _httpx_timeout(timeout):
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
@@ -0,0 +1,206 @@
+""" Conditional-request caching of Web API responses """
+
+__all__ = ["HTTPCache", "MemoryHTTPCache", "FileHTTPCache"]
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(collections.namedtuple("CacheEntry", ["body", "etag", "expires_at"])):
+    """
+    A cached response body, with the `ETag` used to revalidate it and the
+    time until which it can be used without revalidation.
+    """
+
+    def is_fresh(self, now=None):
+        return self.expires_at is not None and self.expires_at > (now or time.time())
+
+    @classmethod
+    def from_response(cls, response, body=None):
+        """
+        Build an entry from a response, or return None if the response
+        mustn't or can't usefully be cached.
+        """
+        directives = _parse_cache_control(response.headers.get("Cache-Control", ""))
+        if "no-store" in directives:
+            return None
+
+        expires_at = None
+        if "no-cache" not in directives:
+            try:
+                max_age = int(directives.get("max-age", 0))
+            except ValueError:
+                max_age = 0
+            if max_age > 0:
+                expires_at = time.time() + max_age
+
+        etag = response.headers.get("ETag")
+        if etag is None and expires_at is None:
+            return None
+        return cls(response.content if body is None else body, etag, expires_at)
+
+
+def _parse_cache_control(header):
+    directives = {}
+    for directive in header.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+class HTTPCache:
+    """
+    An abstraction layer for storing cached responses.
+
+    Custom extensions of this class must implement get and set with the
+    same input and output structure as the HTTPCache class.
+    """
+
+    def get(self, key):
+        """
+        Return the CacheEntry stored under `key`, or None.
+        """
+        raise NotImplementedError()
+
+    def set(self, key, entry):
+        """
+        Store a CacheEntry under `key` and return None.
+        """
+        raise NotImplementedError()
+
+
+class MemoryHTTPCache(HTTPCache):
+    """
+    A thread-safe, least-recently-used in-memory cache, capped by the total
+    size of the stored bodies.
+    """
+
+    def __init__(self, max_size=32 * 1024 * 1024):
+        """
+        Parameters:
+            * max_size: Maximum number of bytes of response bodies to keep
+        """
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if len(entry.body) > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+
+
+class FileHTTPCache(HTTPCache):
+    """
+    Stores each cached response in its own file in a directory on disk,
+    capped by the total size of the files.
+
+    Hits touch their file, and once the directory grows past `max_size`
+    the least recently used files are removed until it is back under 90%
+    of it. Several processes can share the directory.
+    """
+
+    def __init__(self, directory, max_size=256 * 1024 * 1024):
+        """
+        Parameters:
+            * directory: Directory holding the cache files, created if needed
+            * max_size: Maximum number of bytes of cache files to keep
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # an estimate between evictions, as other processes write too
+        self.size = sum(size for _, size, _ in self._files())
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def _files(self):
+        """(mtime, size, path) of the cache files"""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    # cache files are named by a sha256, unlike temporary ones
+                    if len(entry.name) != 64:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            logger.warning("Couldn't list the cache in: %s", self.directory)
+        return files
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        try:
+            # recently used files are evicted last
+            os.utime(path)
+        except OSError:
+            pass
+        return CacheEntry(body, meta["etag"], meta["expires_at"])
+
+    def set(self, key, entry):
+        meta = {"etag": entry.etag, "expires_at": entry.expires_at}
+        data = json.dumps(meta).encode() + b"\n" + entry.body
+        if len(data) > self.max_size:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.warning("Couldn't write response to cache in: %s", self.directory)
+            return
+        with self._lock:
+            self.size += len(data)
+            if self.size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(self._files())
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in files:
+            if size <= self.max_size * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+        self.size = size
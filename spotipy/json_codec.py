@@ -0,0 +1,63 @@
+""" Pluggable encoding and decoding of Web API JSON bodies """
+
+__all__ = [
+    "JSONCodec",
+    "StdlibJSONCodec",
+    "OrjsonCodec",
+    "fastest_json_codec",
+]
+
+import json
+
+
+class JSONCodec:
+    """
+    An abstraction layer for encoding request bodies and decoding responses.
+
+    Custom extensions of this class must implement loads, taking bytes and
+    raising a ValueError on invalid input, and dumps, returning str or bytes.
+    The client's own helpers (pagination, bulk lookups) read what loads
+    returns, so it must decode; endpoints taking `raw=True` return the
+    undecoded bodies instead.
+    """
+
+    def loads(self, data):
+        raise NotImplementedError()
+
+    def dumps(self, obj):
+        raise NotImplementedError()
+
+
+class StdlibJSONCodec(JSONCodec):
+    """Uses the standard library's json module"""
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JSONCodec):
+    """Uses orjson, several times faster than json on large pages"""
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError("OrjsonCodec requires orjson: pip install orjson")
+        self._orjson = orjson
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self._orjson.dumps(obj)
+
+
+def fastest_json_codec():
+    """Return an OrjsonCodec if orjson is installed, a StdlibJSONCodec otherwise"""
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return StdlibJSONCodec()
@@ -3,8 +3,23 @@ __all__ = [
     "DEFAULT_SCOPES",
 ]
 
-from .client import Spotify
+import asyncio
+from urllib.parse import urljoin
+
+from .async_client import AsyncSpotify
+from .batching import MicroBatcher
+from .cassette import record_session, replay_session
+from .client import Spotify, build_session, session_pool_stats
+from .deadline import deadline
+from .flow_control import AdaptiveConcurrencyLimiter, CircuitBreaker
+from .hedging import HedgingPolicy, hedged_requests
+from .json_codec import fastest_json_codec
+from .metrics import MemoryMetricsSink, count_calls
 from .oauth2 import SpotifyClientCredentials, SpotifyOAuth
+from .rate_limit import get_rate_limiter
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .tracing import RequestTracer
+from .util import chunked, imap_bounded, offset_page_urls
 
 DEFAULT_SCOPES = [
     "user-read-private",
@@ -18,10 +33,50 @@ DEFAULT_SCOPES = [
     "playlist-read-private",
 ]
 
+# `total`, `limit` and `offset` let us request all the pages at once
+PLAYLIST_TRACKS_FIELDS = (
+    "items(track(id,name,artists(name),album(name),is_local)),"
+    "next,total,limit,offset"
+)
+
+# maximum number of IDs accepted by the audio-features endpoint
+AUDIO_FEATURES_BATCH_SIZE = 100
+
+
+def _user_identity(user_id):
+    return None if user_id is None else "user:{}".format(user_id)
+
 
 class SpotifyManager:
     def __init__(
-        self, id, secret, redirect_uri, scopes=None, requests_timeout=10, retries=10
+        self,
+        id,
+        secret,
+        redirect_uri,
+        scopes=None,
+        requests_timeout=10,
+        retries=10,
+        max_workers=8,
+        read_ahead=None,
+        rate_limit=None,
+        rate_limit_burst=None,
+        rate_limit_file=None,
+        http_cache=None,
+        pool_connections=4,
+        pool_maxsize=16,
+        pool_block=False,
+        circuit_failure_threshold=5,
+        circuit_recovery_timeout=30,
+        metrics=None,
+        request_deadline=10,
+        api_prefix=None,
+        accounts_url=None,
+        json_codec=None,
+        features_batch_wait=0.02,
+        trace_every=0,
+        http2=False,
+        hedge_budget=0.05,
+        app_token_cache=None,
     ):
         self.client_id = id
         self.client_secret = secret
@@ -29,8 +84,64 @@ class SpotifyManager:
         self.scopes = scopes or DEFAULT_SCOPES
         self.requests_timeout = requests_timeout
         self.retries = retries
+        # point the clients at another Web API, e.g. tests/fake_server.py
+        self.api_prefix = api_prefix
+        # default time budget of the calls made to serve one page view
+        self.request_deadline = request_deadline
+        # maximum number of concurrent requests made by a single paginated fetch
+        self.max_workers = max_workers
+        # maximum number of pages fetched ahead of a consumer (default max_workers)
+        self.read_ahead = read_ahead
+        # shared by every client of this app, in this process or (with a file)
+        # across processes
+        self.rate_limiter = get_rate_limiter(
+            id, rate=rate_limit, burst=rate_limit_burst, path=rate_limit_file
+        )
+        # optional HTTPCache shared by the synchronous clients
+        self.http_cache = http_cache
+        # identical concurrent GETs (e.g. the same public playlist) share a request
+        self.single_flight = SingleFlight()
+        self.async_single_flight = AsyncSingleFlight()
+        # requests in flight adapt to how Spotify copes, and stop altogether
+        # while it is failing
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max_workers, max_limit=pool_maxsize
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=circuit_failure_threshold,
+            recovery_timeout=circuit_recovery_timeout,
+        )
+        # orjson, when it is installed, decodes large pages much faster
+        self.json_codec = json_codec or fastest_json_codec()
+        # log one request in `trace_every`, or none
+        self.tracer = RequestTracer(every=trace_every) if trace_every else None
+        # slow GETs made within `hedged_requests()` are sent again, adding at
+        # most `hedge_budget` more requests
+        self.hedging = HedgingPolicy(max_extra=hedge_budget) if hedge_budget else None
+        # every request made by the clients is reported to this MetricsSink
+        self.metrics = MemoryMetricsSink() if metrics is None else metrics
+        # one connection pool for every client, only the bearer token differs
+        self.session = build_session(
+            retries=retries,
+            status_retries=Spotify.max_retries,
+            status_forcelist=[
+                # 429s are handled by the shared rate limiter
+                code
+                for code in Spotify.default_retry_codes
+                if code != 429
+            ],
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            http2=http2,
+        )
+        # a CacheHandler shared between processes lets one of them refresh
+        # the app token for all the others
         self.client_credentials = SpotifyClientCredentials(
-            client_id=id, client_secret=secret, requests_timeout=requests_timeout
+            client_id=id,
+            client_secret=secret,
+            requests_timeout=requests_timeout,
+            cache_handler=app_token_cache,
         )
         self.oauth = SpotifyOAuth(
             client_id=id,
@@ -39,23 +150,149 @@ class SpotifyManager:
             requests_timeout=requests_timeout,
             scope=" ".join(self.scopes),
         )
-        self.app_client = Spotify(
-            auth_manager=self.client_credentials,
-            requests_timeout=requests_timeout,
-            retries=retries,
+        if accounts_url is not None:
+            token_url = urljoin(accounts_url, "api/token")
+            self.client_credentials.OAUTH_TOKEN_URL = token_url
+            self.oauth.OAUTH_TOKEN_URL = token_url
+            self.oauth.OAUTH_AUTHORIZE_URL = urljoin(accounts_url, "authorize")
+        self.app_client = self._configure(
+            Spotify(
+                auth_manager=self.client_credentials,
+                requests_session=self.session,
+                **self._client_kwargs(),
+            )
+        )
+        # single-track lookups from concurrent page views share a request
+        self.features_batcher = MicroBatcher(
+            self.app_client.audio_features,
+            max_batch_size=AUDIO_FEATURES_BATCH_SIZE,
+            max_wait=features_batch_wait,
         )
 
-    def user_client(self, access_token, requests_timeout=None, retries=None):
-        if retries is None:
-            retries = self.retries
-        if requests_timeout is None:
-            requests_timeout = self.requests_timeout
-        return Spotify(
-            auth=access_token,
-            requests_timeout=requests_timeout,
-            retries=retries,
+    def user_client(
+        self, access_token, requests_timeout=None, retries=None, user_id=None
+    ):
+        """
+        A client for a user's access token. Pass the user's Spotify ID so
+        that cached responses survive token refreshes.
+        """
+        kwargs = self._client_kwargs(requests_timeout, retries)
+        return self._configure(
+            Spotify(
+                auth=access_token,
+                # the shared pool retries `self.retries` times
+                requests_session=(
+                    self.session if kwargs["retries"] == self.retries else True
+                ),
+                cache_identity=_user_identity(user_id),
+                **kwargs,
+            )
+        )
+
+    def async_user_client(
+        self, access_token, requests_timeout=None, retries=None, user_id=None
+    ):
+        return self._configure(
+            AsyncSpotify(
+                auth=access_token,
+                cache_identity=_user_identity(user_id),
+                **self._client_kwargs(requests_timeout, retries, asynchronous=True),
+            )
+        )
+
+    def async_app_client(self):
+        return self._configure(
+            AsyncSpotify(
+                auth_manager=self.client_credentials,
+                **self._client_kwargs(asynchronous=True),
+            )
         )
 
+    def _client_kwargs(self, requests_timeout=None, retries=None, asynchronous=False):
+        """Arguments shared by every client made by the manager"""
+        kwargs = dict(
+            requests_timeout=(
+                self.requests_timeout if requests_timeout is None else requests_timeout
+            ),
+            retries=self.retries if retries is None else retries,
+            rate_limiter=self.rate_limiter,
+            max_workers=self.max_workers,
+            circuit_breaker=self.circuit_breaker,
+            metrics=self.metrics,
+            json_codec=self.json_codec,
+            tracer=self.tracer,
+        )
+        if asynchronous:
+            # AsyncSpotify has no HTTP cache or hedging, and the concurrency
+            # limiter would block the event loop, so those are left out
+            kwargs.update(single_flight=self.async_single_flight)
+        else:
+            kwargs.update(
+                single_flight=self.single_flight,
+                http_cache=self.http_cache,
+                concurrency_limiter=self.concurrency_limiter,
+                hedging=self.hedging,
+            )
+        return kwargs
+
+    def _configure(self, client):
+        if self.api_prefix is not None:
+            client.prefix = self.api_prefix
+        return client
+
+    def get_single_track_features(self, track_id):
+        """
+        Audio features of one track, looked up together with the tracks
+        requested by other threads within `features_batch_wait` seconds
+        """
+        return self.features_batcher.submit(track_id)
+
+    def use_cassette(self, cassette, replay=True, latency=0):
+        """
+        Record the responses to the requests made by the app and its users
+        into a Cassette, or answer them from it without network access,
+        waiting `latency` seconds per request.
+
+        Only the shared session and the auth managers are covered: user
+        clients with non-default retries and the async clients aren't.
+        """
+        sessions = [
+            self.session,
+            self.client_credentials._session,
+            self.oauth._session,
+        ]
+        for session in sessions:
+            if replay:
+                replay_session(session, cassette, latency=latency)
+            else:
+                record_session(session, cassette)
+
+    def pool_stats(self):
+        """Usage statistics of the shared connection pool, per host"""
+        return session_pool_stats(self.session)
+
+    def request_stats(self):
+        """
+        Request statistics per endpoint, with p50/p95/p99 latencies, if the
+        metrics sink can report them
+        """
+        summary = getattr(self.metrics, "summary", None)
+        return summary() if summary is not None else {}
+
+    # counts the requests made in a block, e.g. by one playlist update
+    count_calls = staticmethod(count_calls)
+
+    # hedges the slow GETs made in a block, e.g. the ones a page waits for
+    hedged_requests = staticmethod(hedged_requests)
+
+    def deadline(self, seconds=None):
+        """
+        Give the Spotify calls made in a block `seconds` to complete,
+        `request_deadline` by default. Calls made after that raise a
+        SpotifyTimeoutError.
+        """
+        return deadline(self.request_deadline if seconds is None else seconds)
+
     def authorize_url(self, state):
         return self.oauth.get_authorize_url(state)
 
@@ -65,18 +302,63 @@ class SpotifyManager:
     def refresh_tokens(self, refresh_token):
         return self.oauth.refresh_access_token(refresh_token)
 
-    @staticmethod
-    def _next_until_end(client, response):
-        items = response["items"]
-        while response["next"]:
-            response = client.next(response)
-            items.extend(response["items"])
+    def iter_pages(self, client, response):
+        """
+        Yield `response` and every page following it. Later pages are
+        fetched concurrently, at most `read_ahead` pages ahead of the
+        consumer, so memory use is bounded by the page size.
+        """
+        yield response
+        urls = offset_page_urls(response)
+        if urls is None:
+            # not an offset-based page, so we can only follow the `next` links
+            while response["next"]:
+                response = client.next(response)
+                yield response
+            return
+
+        yield from imap_bounded(
+            client._get, urls, self.max_workers, read_ahead=self.read_ahead
+        )
+
+    def iter_items(self, client, response):
+        for page in self.iter_pages(client, response):
+            yield from page["items"]
+
+    def _next_until_end(self, client, response):
+        return list(self.iter_items(client, response))
+
+    async def _async_next_until_end(self, client, response):
+        items = list(response["items"])
+        urls = offset_page_urls(response)
+        if urls is None:
+            while response["next"]:
+                response = await client.next(response)
+                items.extend(response["items"])
+            return items
+
+        semaphore = asyncio.Semaphore(max(self.max_workers or 1, 1))
+
+        async def get_page(url):
+            async with semaphore:
+                return await client._get(url)
+
+        for page in await asyncio.gather(*(get_page(url) for url in urls)):
+            items.extend(page["items"])
         return items
 
-    def get_playlists(self, access_token):
-        client = self.user_client(access_token)
+    def iter_current_user_playlists(self, access_token, user_id=None):
+        client = self.user_client(access_token, user_id=user_id)
         response = client.current_user_playlists(limit=50)
-        return SpotifyManager._next_until_end(client, response)
+        yield from self.iter_items(client, response)
+
+    def get_playlists(self, access_token, user_id=None):
+        return list(self.iter_current_user_playlists(access_token, user_id))
+
+    async def async_get_playlists(self, access_token, user_id=None):
+        async with self.async_user_client(access_token, user_id=user_id) as client:
+            response = await client.current_user_playlists(limit=50)
+            return await self._async_next_until_end(client, response)
 
     @staticmethod
     def get_playlist_status(playlist_data):
@@ -87,25 +369,55 @@ class SpotifyManager:
         else:
             return "PR"
 
-    @staticmethod
-    def get_playlist_tracks(client, playlist_id):
-        response = client.playlist_items(
+    def iter_playlist_items(self, client, playlist_id, fields=PLAYLIST_TRACKS_FIELDS):
+        response = client.playlist_items(playlist_id, limit=50, fields=fields)
+        yield from self.iter_items(client, response)
+
+    def iter_playlist_tracks(self, client, playlist_id):
+        for item in self.iter_playlist_items(client, playlist_id):
+            if not item["track"].get("is_local", True):
+                yield item["track"]
+
+    def get_playlist_tracks(self, client, playlist_id):
+        return list(self.iter_playlist_tracks(client, playlist_id))
+
+    async def async_get_playlist_tracks(self, client, playlist_id):
+        response = await client.playlist_items(
             playlist_id,
             limit=50,
-            fields="items(track(id,name,artists(name),album(name),is_local)),next",
+            fields=PLAYLIST_TRACKS_FIELDS,
         )
-        results = SpotifyManager._next_until_end(client, response)
+        results = await self._async_next_until_end(client, response)
         return [
             track["track"]
             for track in results
             if not track["track"].get("is_local", True)
         ]
 
+    def iter_track_features(self, track_ids):
+        """
+        Yield the audio features of each track in `track_ids`, in order.
+        Batches are requested concurrently, and the features of the first
+        batches are yielded while later batches are still in flight.
+        """
+        batches = chunked(track_ids, AUDIO_FEATURES_BATCH_SIZE)
+        for response in imap_bounded(
+            self.app_client.audio_features, batches, self.max_workers
+        ):
+            yield from response
+
     def get_track_features(self, track_ids):
-        track_features = []
-        while track_ids:
-            response = self.app_client.audio_features(track_ids[:100])
-            track_ids = track_ids[100:]
-            track_features.extend(response)
+        return list(self.iter_track_features(track_ids))
+
+    async def async_get_track_features(self, track_ids):
+        semaphore = asyncio.Semaphore(max(self.max_workers or 1, 1))
+        async with self.async_app_client() as client:
+
+            async def get_batch(batch):
+                async with semaphore:
+                    return await client.audio_features(batch)
+
+            batches = chunked(track_ids, AUDIO_FEATURES_BATCH_SIZE)
+            responses = await asyncio.gather(*(get_batch(b) for b in batches))
 
-        return track_features
+        return [features for response in responses for features in response]
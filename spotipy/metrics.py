@@ -0,0 +1,199 @@
+""" Per-request instrumentation of Web API calls """
+
+__all__ = [
+    "RequestEvent",
+    "MetricsSink",
+    "MemoryMetricsSink",
+    "CallCounter",
+    "count_calls",
+    "endpoint_template",
+]
+
+import collections
+import contextlib
+import contextvars
+import re
+import threading
+from urllib.parse import urlparse
+
+# base62 IDs, e.g. 37i9dQZF1DXcBWIGoYBM5M
+_ID_RE = re.compile(r"[0-9A-Za-z]{22}")
+# segments followed by a free-form ID rather than a base62 one
+_NAMED_COLLECTIONS = {"users", "categories"}
+
+
+def endpoint_template(url):
+    """
+    Return the endpoint of a Web API URL with its IDs replaced by `{id}`,
+    e.g. `playlists/{id}/tracks`
+    """
+    segments = urlparse(url).path.strip("/").split("/")
+    if segments and segments[0] == "v1":
+        segments = segments[1:]
+    template = []
+    for i, segment in enumerate(segments):
+        if _ID_RE.fullmatch(segment) or (i and segments[i - 1] in _NAMED_COLLECTIONS):
+            segment = "{id}"
+        template.append(segment)
+    return "/".join(template)
+
+
+class RequestEvent(
+    collections.namedtuple(
+        "RequestEvent",
+        [
+            "endpoint",
+            "method",
+            "status",
+            "latency",
+            "retries",
+            "response_bytes",
+            "decode_time",
+        ],
+    )
+):
+    """
+    One request made to the Web API, retries included. `status` is None if
+    no response was received, and times are in seconds.
+    """
+
+    @property
+    def is_error(self):
+        return self.status is None or self.status >= 400
+
+
+class MetricsSink:
+    """
+    Receives a RequestEvent for every request made by the clients using it.
+
+    Custom extensions of this class must implement record, which is called
+    from any thread making requests.
+    """
+
+    def record(self, event):
+        raise NotImplementedError()
+
+
+class _Histogram:
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.response_bytes = 0
+        self.decode_time = 0
+        self.latencies = collections.deque(maxlen=max_samples)
+
+    def add(self, event):
+        self.count += 1
+        self.errors += event.is_error
+        self.retries += event.retries
+        self.response_bytes += event.response_bytes
+        self.decode_time += event.decode_time
+        self.latencies.append(event.latency)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "response_bytes": self.response_bytes,
+            "decode_time": self.decode_time,
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+        }
+
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of sorted `values`"""
+    if not values:
+        return None
+    rank = -(-len(values) * percent // 100)
+    return values[max(int(rank), 1) - 1]
+
+
+class MemoryMetricsSink(MetricsSink):
+    """
+    Keeps per-endpoint counters in memory, along with the latencies of the
+    most recent requests to report percentiles.
+    """
+
+    def __init__(self, max_samples=1000):
+        """
+        Parameters:
+            * max_samples: Number of latencies kept per endpoint
+        """
+        self.max_samples = max_samples
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        key = "{} {}".format(event.method, event.endpoint)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.max_samples)
+            histogram.add(event)
+
+    def summary(self):
+        """
+        Statistics per endpoint, keyed by method and endpoint template
+        (e.g. `GET playlists/{id}/tracks`), with the p50, p95 and p99
+        latencies in seconds
+        """
+        with self._lock:
+            return {key: h.summary() for key, h in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+_call_counter = contextvars.ContextVar("spotipy_call_counter", default=None)
+
+
+class CallCounter:
+    """Counts the requests made while it is active, see :func:`count_calls`"""
+
+    def __init__(self, parent=None):
+        self.calls = 0
+        self._parent = parent
+        self._lock = threading.Lock()
+
+    def increment(self):
+        counter = self
+        while counter is not None:
+            with counter._lock:
+                counter.calls += 1
+            counter = counter._parent
+
+
+@contextlib.contextmanager
+def count_calls():
+    """
+    Count the Web API requests made in this context, including those made
+    by the worker threads of paginated and bulk fetches.
+
+        with count_calls() as counter:
+            ...
+        print(counter.calls)
+    """
+    counter = CallCounter(_call_counter.get())
+    token = _call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_counter.reset(token)
+
+
+def is_recording(sink):
+    return sink is not None or _call_counter.get() is not None
+
+
+def record_event(sink, event):
+    if sink is not None:
+        sink.record(event)
+    counter = _call_counter.get()
+    if counter is not None:
+        counter.increment()
@@ -157,6 +157,7 @@ class SpotifyClientCredentials(SpotifyAuthBase):
         proxies=None,
         requests_session=True,
         requests_timeout=None,
+        cache_handler=None,
     ):
         """
         Creates a Client Credentials Flow Manager.
@@ -178,6 +179,11 @@ class SpotifyClientCredentials(SpotifyAuthBase):
              * requests_session: A Requests session
              * requests_timeout: Optional, tell Requests to stop waiting for a response after
                                  a given number of seconds
+             * cache_handler: An instance of the `CacheHandler` class to handle
+                              getting and saving cached authorization tokens.
+                              Optional, will otherwise use `MemoryCacheHandler`.
+                              A handler shared between processes lets a single
+                              one of them request each new token.
 
         """
 
@@ -187,7 +193,7 @@ class SpotifyClientCredentials(SpotifyAuthBase):
         self.client_secret = client_secret
         self.proxies = proxies
         self.requests_timeout = requests_timeout
-        self.cache_handler = MemoryCacheHandler()
+        self.cache_handler = cache_handler or MemoryCacheHandler()
 
     def get_access_token(self, as_dict=True):
         """
@@ -212,9 +218,13 @@ class SpotifyClientCredentials(SpotifyAuthBase):
         if token_info and not self.is_token_expired(token_info):
             return token_info if as_dict else token_info["access_token"]
 
-        token_info = self._request_access_token()
-        token_info = self._add_custom_values_to_token_info(token_info)
-        self.cache_handler.save_token_to_cache(token_info)
+        with self.cache_handler.refresh_lock():
+            # someone else may have refreshed it while we waited for the lock
+            token_info = self.cache_handler.get_cached_token()
+            if not token_info or self.is_token_expired(token_info):
+                token_info = self._request_access_token()
+                token_info = self._add_custom_values_to_token_info(token_info)
+                self.cache_handler.save_token_to_cache(token_info)
         return token_info if as_dict else token_info["access_token"]
 
     def _request_access_token(self):
@@ -0,0 +1,150 @@
+""" Token-bucket rate limiting shared between Spotify clients """
+
+__all__ = ["RateLimiter", "FileRateLimiter", "get_rate_limiter"]
+
+import contextlib
+import json
+import logging
+import threading
+import time
+
+from spotipy.util import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket.
+
+    Every outgoing request takes one token. Tokens are refilled at `rate`
+    per second, up to `burst` tokens, or never run out if `rate` is None.
+    When Spotify answers with a 429, calling `pause` with the `Retry-After`
+    delay stops every client sharing this limiter until the delay has
+    passed, instead of each of them retrying on its own.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        """
+        Parameters:
+             * rate: Number of requests allowed per second on average,
+                     None (the default) to only pause on 429s
+             * burst: Maximum number of requests that can be sent at once
+                      (defaults to `rate`)
+        """
+        self.rate = rate
+        self.burst = burst or rate
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+    def _initial_state(self):
+        return {"tokens": self.burst, "updated": time.time(), "paused_until": 0}
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        """
+        Give exclusive access to the bucket state.
+        Subclasses override this to share the state between processes.
+        """
+        with self._lock:
+            yield self._state
+
+    def _refill(self, state, now):
+        elapsed = max(now - state["updated"], 0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    def reserve(self):
+        """
+        Try to take a token. Returns 0 on success, otherwise the number of
+        seconds to wait before trying again.
+        """
+        now = time.time()
+        with self._locked_state() as state:
+            if state["paused_until"] > now:
+                return state["paused_until"] - now
+            if self.rate is None:
+                return 0
+            self._refill(state, now)
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0
+            return (1 - state["tokens"]) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Block until a token is available, then take it, or for at most
+        `timeout` seconds. Return whether a token was taken.
+        """
+        give_up = None if timeout is None else time.monotonic() + timeout
+        wait = self.reserve()
+        while wait > 0:
+            if give_up is not None and time.monotonic() + wait > give_up:
+                return False
+            time.sleep(wait)
+            wait = self.reserve()
+        return True
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the next `seconds` seconds"""
+        now = time.time()
+        logger.warning("Rate limited by Spotify, pausing requests for %ss", seconds)
+        with self._locked_state() as state:
+            state["paused_until"] = max(state["paused_until"], now + seconds)
+            # resume gently rather than with a full burst
+            state["tokens"] = 0
+            state["updated"] = state["paused_until"]
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    A token bucket whose state lives in a JSON file guarded by a file lock,
+    so that several processes on the same host can share it.
+    """
+
+    def __init__(self, path, rate=None, burst=None):
+        """
+        Parameters:
+             * path: Path of the file holding the shared state
+             * rate: Number of requests allowed per second on average,
+                     None to only pause on 429s
+             * burst: Maximum number of requests that can be sent at once
+        """
+        self.path = path
+        super().__init__(rate=rate, burst=burst)
+
+    def _read_state(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return self._initial_state()
+
+    @contextlib.contextmanager
+    def _locked_state(self):
+        with self._lock, file_lock(self.path + ".lock"):
+            state = self._read_state()
+            yield state
+            with open(self.path, "w") as f:
+                json.dump(state, f)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key, rate=None, burst=None, path=None):
+    """
+    Return the process-wide rate limiter for `key` (usually the app's
+    client ID), creating it if needed. If `path` is given, the limiter is
+    shared with other processes through that file.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if path:
+                limiter = FileRateLimiter(path, rate=rate, burst=burst)
+            else:
+                limiter = RateLimiter(rate=rate, burst=burst)
+            _limiters[key] = limiter
+        return limiter
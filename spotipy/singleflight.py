@@ -0,0 +1,164 @@
+""" Coalescing of identical in-flight requests """
+
+__all__ = ["SingleFlight", "AsyncSingleFlight"]
+
+import asyncio
+import copy
+import threading
+
+from spotipy.deadline import remaining_time
+from spotipy.exceptions import SpotifyTimeoutError
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Makes sure that only one call with a given key is in flight at a time.
+
+    Threads calling `do` with the key of a call that is already running
+    wait for it to finish and get a copy of its result (or its exception)
+    instead of making the same call again. They wait no longer than their
+    own deadline, and make the call themselves if the call they waited
+    for ran out of its caller's time.
+
+    Counters:
+        - calls - number of calls actually made
+        - hits - number of calls served by another in-flight call
+        - waiters - number of threads currently waiting on another call
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.hits = 0
+        self.waiters = 0
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "hits": self.hits, "waiters": self.waiters}
+
+    def do(self, key, func):
+        """Call `func()`, unless a call for `key` is already in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                call.waiters += 1
+                self.hits += 1
+                self.waiters += 1
+        if not leader:
+            return self._wait(key, call, func)
+
+        try:
+            result = func()
+        except BaseException as error:
+            self._finish(key, call, error=error)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    def _wait(self, key, call, func):
+        try:
+            finished = call.event.wait(_wait_timeout())
+        finally:
+            with self._lock:
+                self.waiters -= 1
+        if not finished:
+            raise SpotifyTimeoutError("Deadline exceeded waiting for the same request")
+        if isinstance(call.error, SpotifyTimeoutError):
+            # the leader's deadline, which may be tighter than ours
+            return self.do(key, func)
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+            shared = call.waiters > 0
+        if shared and error is None:
+            # the caller is free to modify `result`, so share a snapshot
+            call.result = copy.deepcopy(result)
+        call.error = error
+        call.event.set()
+
+
+def _wait_timeout():
+    """Seconds a waiter may wait, within its own deadline, or None"""
+    remaining = remaining_time()
+    return None if remaining is None else max(remaining, 0)
+
+
+class _AsyncCall:
+    def __init__(self, loop):
+        self.future = loop.create_future()
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Asynchronous version of :class:`SingleFlight`, for coroutines running
+    in an event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.hits = 0
+        self.waiters = 0
+
+    def stats(self):
+        return {"calls": self.calls, "hits": self.hits, "waiters": self.waiters}
+
+    async def do(self, key, func):
+        """Await `func()`, unless a call for `key` is already in flight"""
+        loop = asyncio.get_running_loop()
+        # futures can't be awaited from another loop
+        loop_key = (id(loop), key)
+        call = self._calls.get(loop_key)
+        if call is not None:
+            call.waiters += 1
+            self.hits += 1
+            self.waiters += 1
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.shield(call.future), _wait_timeout()
+                )
+            except asyncio.TimeoutError:
+                raise SpotifyTimeoutError(
+                    "Deadline exceeded waiting for the same request"
+                )
+            except SpotifyTimeoutError:
+                # the leader's deadline, which may be tighter than ours
+                return await self.do(key, func)
+            finally:
+                self.waiters -= 1
+            return copy.deepcopy(result)
+
+        call = self._calls[loop_key] = _AsyncCall(loop)
+        self.calls += 1
+        try:
+            result = await func()
+        except BaseException as error:
+            del self._calls[loop_key]
+            if isinstance(error, Exception):
+                call.future.set_exception(error)
+                # don't warn about an exception nobody was waiting for
+                call.future.exception()
+            else:
+                call.future.cancel()
+            raise
+        del self._calls[loop_key]
+        call.future.set_result(copy.deepcopy(result) if call.waiters else None)
+        return result
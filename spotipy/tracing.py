@@ -0,0 +1,62 @@
+""" Sampled logging of Web API requests and responses """
+
+__all__ = ["RequestTracer"]
+
+import itertools
+import logging
+
+REDACTED_HEADERS = {"authorization"}
+
+
+class RequestTracer:
+    """
+    Logs one in every `every` requests, with their response, at INFO level.
+
+    Bodies are truncated to `max_body_size` bytes and bearer tokens are
+    redacted. Requests that aren't sampled cost a counter increment, and
+    clients without a tracer don't log requests at all.
+    """
+
+    def __init__(self, every=100, max_body_size=2048, logger=None):
+        """
+        Parameters:
+            * every: Log one request in `every`, 1 to log them all
+            * max_body_size: Bodies are cut after this many bytes
+            * logger: Logger to use, `spotipy.tracing` by default
+        """
+        self.every = max(int(every), 1)
+        self.max_body_size = max_body_size
+        self.logger = logger or logging.getLogger(__name__)
+        self._counter = itertools.count()
+
+    def sample(self):
+        """Whether to trace the next request"""
+        return next(self._counter) % self.every == 0 and self.logger.isEnabledFor(
+            logging.INFO
+        )
+
+    def trace(self, method, url, args, headers, response, latency):
+        self.logger.info(
+            "%s %s params=%s headers=%s body=%s -> %s in %.3fs: %s",
+            method,
+            url,
+            args.get("params"),
+            {
+                name: "<redacted>" if name.lower() in REDACTED_HEADERS else value
+                for name, value in headers.items()
+            },
+            self._truncate(args.get("data")),
+            getattr(response, "status_code", None),
+            latency,
+            self._truncate(getattr(response, "content", None)),
+        )
+
+    def _truncate(self, body):
+        if not body:
+            return None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        text = body[: self.max_body_size].decode("utf-8", "replace")
+        if len(body) > self.max_body_size:
+            text += "... ({} bytes)".format(len(body))
+        return text
@@ -2,7 +2,20 @@
 
 __all__ = ["CLIENT_CREDS_ENV_VARS"]
 
+import collections
+import contextlib
+import contextvars
+import itertools
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,3 +40,109 @@ def normalize_scope(scope):
         return " ".join(sorted(scopes))
     else:
         return None
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on the file at `path`"""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            return
+
+        # locks the first byte, which doesn't need to exist
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                # LK_LOCK gives up after 10 seconds
+                continue
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def parse_retry_after(headers, default=None):
+    """Return the number of seconds asked for by a `Retry-After` header"""
+    try:
+        return max(float(headers["Retry-After"]), 0)
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+def chunked(iterable, size):
+    """Split `iterable` into consecutive lists of at most `size` items"""
+    iterator = iter(iterable)
+    chunks = []
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        chunks.append(chunk)
+        chunk = list(itertools.islice(iterator, size))
+    return chunks
+
+
+def imap_bounded(func, iterable, max_workers, read_ahead=None):
+    """
+    Like map(func, iterable), but runs the calls on a pool of `max_workers`
+    threads. Results are yielded in input order and at most `read_ahead`
+    calls (default: `max_workers`) are in flight ahead of the consumer.
+    Each call runs in a copy of the caller's context, so context variables
+    set by the caller are visible inside `func`.
+    """
+    if max_workers is None or max_workers <= 1:
+        yield from map(func, iterable)
+        return
+
+    read_ahead = max(read_ahead or max_workers, 1)
+    iterator = iter(iterable)
+    pending = collections.deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(arg):
+        context = contextvars.copy_context()
+        pending.append(executor.submit(context.run, func, arg))
+
+    try:
+        for arg in itertools.islice(iterator, read_ahead):
+            submit(arg)
+        while pending:
+            future = pending.popleft()
+            # keep the pool busy while the consumer handles this result
+            for arg in itertools.islice(iterator, 1):
+                submit(arg)
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def offset_page_urls(page):
+    """
+    Compute the URLs of all the pages following `page` in an offset-based
+    paging object, using its `total`, `limit` and `offset` fields.
+    Returns None if the page doesn't contain enough information.
+    """
+    next_url = page.get("next")
+    if not next_url:
+        return []
+    total, limit, offset = page.get("total"), page.get("limit"), page.get("offset")
+    if total is None or not limit or offset is None:
+        return None
+
+    parts = urlsplit(next_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    urls = []
+    for page_offset in range(offset + limit, total, limit):
+        query["offset"] = [str(page_offset)]
+        query["limit"] = [str(limit)]
+        urls.append(urlunsplit(parts._replace(query=urlencode(query, doseq=True))))
+    return urls
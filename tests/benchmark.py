@@ -0,0 +1,77 @@
+"""
+Time a sync of every playlist of the fake Spotify server (tests/fake_server.py)
+through SpotifyManager, to compare settings offline:
+
+    python -m tests.benchmark --latency 0.05 --max-workers 8
+
+The fake server only speaks plain HTTP/1.1, so HTTP/2 is never negotiated
+and its multiplexing can't be measured here. --http2 only switches the
+transport to httpx, still over HTTP/1.1.
+"""
+
+import argparse
+import time
+
+from spotipy import SpotifyManager
+from tests.fake_server import FakeSpotifyData, FakeSpotifyServer
+
+
+def sync(manager, data):
+    """Fetch the tracks and features of every playlist, like Playlist.update_tracks"""
+    client = manager.app_client
+    for playlist in manager.iter_current_user_playlists("fake-access-token"):
+        track_ids = [
+            track["id"]
+            for track in manager.iter_playlist_tracks(client, playlist["id"])
+        ]
+        for _ in manager.iter_track_features(track_ids):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=20)
+    parser.add_argument("--max-playlist-length", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="use the httpx transport (HTTP/1.1 against the fake server)",
+    )
+    args = parser.parse_args()
+
+    data = FakeSpotifyData(
+        playlists=args.playlists, max_playlist_length=args.max_playlist_length
+    )
+    server = FakeSpotifyServer(data=data, latency=args.latency).start()
+    try:
+        manager = SpotifyManager(
+            "benchmark",
+            "secret",
+            "http://127.0.0.1/callback",
+            max_workers=args.max_workers,
+            rate_limit=args.rate_limit,
+            http2=args.http2,
+            api_prefix=server.api_prefix,
+            accounts_url=server.accounts_url,
+        )
+        start = time.monotonic()
+        with manager.count_calls() as counter:
+            sync(manager, data)
+        elapsed = time.monotonic() - start
+    finally:
+        server.stop()
+
+    print(f"{sum(data.playlist_lengths)} tracks in {args.playlists} playlists")
+    print(f"{counter.calls} requests in {elapsed:.2f}s")
+    for endpoint, stats in manager.request_stats().items():
+        print(
+            f"{endpoint:40} {stats['count']:6} "
+            f"p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+A local stand-in for the Spotify Web API and accounts service, serving
+deterministic synthetic data so the sync path can be load-tested offline.
+
+Playlist lengths are drawn from the `playlist_lengths` distribution in
+api/stats/test_data.py. Run it with:
+
+    python -m tests.fake_server --port 8001 --latency 0.05
+
+and point the app at it with:
+
+    SPOTIFY_API_PREFIX=http://127.0.0.1:8001/v1/
+    SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:8001/
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import random
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from api.stats.test_data import playlist_lengths
+
+BASE62 = string.digits + string.ascii_letters
+
+AUDIO_FEATURES = [
+    "acousticness",
+    "danceability",
+    "energy",
+    "instrumentalness",
+    "liveness",
+    "speechiness",
+    "valence",
+]
+
+
+def fake_id(kind, number):
+    """
+    A deterministic, Spotify-like base62 ID, ending with `number` so it can
+    be read back with `fake_number`
+    """
+    digest = hashlib.sha1(kind.encode()).digest()
+    prefix = "".join(BASE62[b % 62] for b in digest[:14])
+    suffix = []
+    for _ in range(8):
+        number, digit = divmod(number, 62)
+        suffix.append(BASE62[digit])
+    return prefix + "".join(reversed(suffix))
+
+
+def fake_number(kind, fake):
+    """The number `fake` was generated from by `fake_id`, or None"""
+    try:
+        number = 0
+        for char in fake[14:]:
+            number = number * 62 + BASE62.index(char)
+    except ValueError:
+        return None
+    return number if fake_id(kind, number) == fake else None
+
+
+def parse_fields(fields):
+    """
+    Parse a Web API `fields` filter like `items(track(id,name)),total` into
+    a tree of nested dicts, with None for fields kept whole.
+    """
+    tree = {}
+    stack = [tree]
+    name = ""
+    for char in fields + ",":
+        if char in ",()":
+            name = name.strip()
+            if char == "(":
+                stack[-1][name] = {}
+                stack.append(stack[-1][name])
+            elif name:
+                stack[-1][name] = None
+            if char == ")":
+                stack.pop()
+            name = ""
+        else:
+            name += char
+    return tree
+
+
+def filter_fields(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [filter_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {k: filter_fields(value[k], t) for k, t in tree.items() if k in value}
+    return value
+
+
+class FakeSpotifyData:
+    """Deterministic synthetic users, playlists, tracks and audio features"""
+
+    def __init__(self, seed=0, playlists=50, tracks=100000, max_playlist_length=10000):
+        """
+        Parameters:
+            * seed: Seed of the generated data
+            * playlists: Number of playlists of the (single) user
+            * tracks: Number of distinct tracks the playlists draw from
+            * max_playlist_length: Longer generated playlists are truncated
+        """
+        self.seed = seed
+        self.playlist_count = playlists
+        self.track_count = tracks
+        self.max_playlist_length = max_playlist_length
+        rng = random.Random(seed)
+        self.playlist_lengths = [
+            min(rng.choice(playlist_lengths), max_playlist_length, tracks)
+            for _ in range(playlists)
+        ]
+        self.user_id = "fake_user"
+        self.playlist_ids = [fake_id("playlist", i) for i in range(playlists)]
+        self._playlist_numbers = {
+            playlist_id: i for i, playlist_id in enumerate(self.playlist_ids)
+        }
+
+    def user(self):
+        return {
+            "id": self.user_id,
+            "display_name": "Fake User",
+            "email": "fake_user@example.com",
+            "type": "user",
+            "uri": f"spotify:user:{self.user_id}",
+        }
+
+    def playlist_number(self, playlist_id):
+        return self._playlist_numbers.get(playlist_id)
+
+    def playlist(self, number):
+        playlist_id = self.playlist_ids[number]
+        return {
+            "id": playlist_id,
+            "name": f"Playlist {number}",
+            "owner": {"id": self.user_id, "display_name": "Fake User"},
+            "collaborative": number % 10 == 0,
+            "public": number % 3 != 0,
+            "snapshot_id": fake_id(f"snapshot:{self.seed}", number),
+            "tracks": {"total": self.playlist_lengths[number]},
+            "type": "playlist",
+            "uri": f"spotify:playlist:{playlist_id}",
+        }
+
+    @functools.lru_cache(maxsize=1024)
+    def playlist_track_numbers(self, number):
+        rng = random.Random(f"{self.seed}:{number}")
+        return rng.sample(range(self.track_count), self.playlist_lengths[number])
+
+    def track_number(self, track_id):
+        number = fake_number("track", track_id)
+        return number if number is not None and number < self.track_count else None
+
+    def track(self, number):
+        track_id = fake_id("track", number)
+        return {
+            "id": track_id,
+            "name": f"Track {number}",
+            "artists": [{"id": fake_id("artist", number % 5000), "name": "Artist"}],
+            "album": {"id": fake_id("album", number % 20000), "name": "Album"},
+            "duration_ms": 120000 + number % 180000,
+            "is_local": False,
+            "type": "track",
+            "uri": f"spotify:track:{track_id}",
+        }
+
+    def audio_features(self, number):
+        rng = random.Random(f"features:{number}")
+        features = {name: rng.random() for name in AUDIO_FEATURES}
+        features.update(
+            id=fake_id("track", number),
+            key=rng.randrange(12),
+            loudness=rng.uniform(-30, 0),
+            mode=rng.randrange(2),
+            tempo=rng.uniform(60, 180),
+            time_signature=rng.choice([3, 4, 4, 4, 5]),
+            type="audio_features",
+        )
+        return features
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # responses are written in several chunks, which mustn't wait on ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        parts = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        segments = [s for s in parts.path.split("/") if s]
+
+        self.server.simulate_latency()
+        if segments == ["api", "token"] and method == "POST":
+            return self._send(200, self._token())
+        if segments == ["authorize"]:
+            return self._authorize()
+        if not segments or segments[0] != "v1" or method != "GET":
+            return self._error(404, "Service not found")
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self._error(401, "No token provided")
+
+        route = self._route(segments[1:])
+        if route is None:
+            return self._error(404, "Service not found")
+        handler, args = route
+        body = handler(*args)
+        if body is None:
+            return self._error(404, "Not found.")
+        if "fields" in self.query:
+            body = filter_fields(body, parse_fields(self.query["fields"]))
+        self._send(200, body)
+
+    def _route(self, segments):
+        routes = {
+            ("me",): self._me,
+            ("me", "playlists"): self._user_playlists,
+            ("users", None, "playlists"): self._user_playlists,
+            ("playlists", None): self._playlist,
+            ("playlists", None, "tracks"): self._playlist_items,
+            ("playlists", None, "items"): self._playlist_items,
+            ("tracks",): self._tracks,
+            ("tracks", None): self._track,
+            ("audio-features",): self._audio_features,
+            ("audio-features", None): self._track_audio_features,
+        }
+        for pattern, handler in routes.items():
+            if len(pattern) == len(segments) and all(
+                p is None or p == s for p, s in zip(pattern, segments)
+            ):
+                return handler, [s for p, s in zip(pattern, segments) if p is None]
+        return None
+
+    @property
+    def data(self):
+        return self.server.data
+
+    def _page(self, items, default_limit, max_limit, path=None):
+        limit = min(int(self.query.get("limit", default_limit)), max_limit)
+        limit = min(limit, self.server.page_size or limit)
+        offset = int(self.query.get("offset", 0))
+        total = len(items)
+
+        def page_url(page_offset):
+            query = dict(self.query, offset=page_offset, limit=limit)
+            url_path = path or urlsplit(self.path).path
+            return f"{self.server.base_url}{url_path}?{urlencode(query)}"
+
+        return {
+            "href": page_url(offset),
+            "items": [item() for item in items[offset : offset + limit]],
+            "limit": limit,
+            "offset": offset,
+            "total": total,
+            "next": page_url(offset + limit) if offset + limit < total else None,
+            "previous": page_url(max(offset - limit, 0)) if offset else None,
+        }
+
+    def _me(self):
+        return self.data.user()
+
+    def _user_playlists(self, user_id=None):
+        items = [
+            functools.partial(self.data.playlist, i)
+            for i in range(self.data.playlist_count)
+        ]
+        return self._page(items, 20, 50)
+
+    def _playlist(self, playlist_id):
+        number = self.data.playlist_number(playlist_id)
+        if number is None:
+            return None
+        playlist = self.data.playlist(number)
+        playlist["tracks"] = self._playlist_items(
+            playlist_id, path=f"/v1/playlists/{playlist_id}/tracks"
+        )
+        return playlist
+
+    def _playlist_items(self, playlist_id, path=None):
+        number = self.data.playlist_number(playlist_id)
+        if number is None:
+            return None
+        items = [
+            functools.partial(self._playlist_item, track_number)
+            for track_number in self.data.playlist_track_numbers(number)
+        ]
+        return self._page(items, 100, 100, path=path)
+
+    def _playlist_item(self, track_number):
+        return {
+            "added_at": "2021-01-01T00:00:00Z",
+            "is_local": False,
+            "track": self.data.track(track_number),
+        }
+
+    def _lookup(self, func, max_ids):
+        ids = [i for i in self.query.get("ids", "").split(",") if i][:max_ids]
+        numbers = [self.data.track_number(i) for i in ids]
+        return [None if n is None else func(n) for n in numbers]
+
+    def _tracks(self):
+        return {"tracks": self._lookup(self.data.track, 50)}
+
+    def _track(self, track_id):
+        number = self.data.track_number(track_id)
+        return None if number is None else self.data.track(number)
+
+    def _audio_features(self):
+        return {"audio_features": self._lookup(self.data.audio_features, 100)}
+
+    def _track_audio_features(self, track_id):
+        number = self.data.track_number(track_id)
+        return None if number is None else self.data.audio_features(number)
+
+    def _token(self):
+        return {
+            "access_token": "fake-access-token",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "refresh_token": "fake-refresh-token",
+            "scope": "",
+        }
+
+    def _authorize(self):
+        query = {"code": "fake-code"}
+        if "state" in self.query:
+            query["state"] = self.query["state"]
+        self.send_response(302)
+        self.send_header(
+            "Location", f"{self.query.get('redirect_uri', '/')}?{urlencode(query)}"
+        )
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _error(self, status, message):
+        self._send(status, {"error": {"status": status, "message": message}})
+
+    def _send(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """
+    Serves the Web API under `/v1/` and the accounts service at the root,
+    from a FakeSpotifyData.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 0),
+        data=None,
+        latency=0,
+        jitter=0,
+        page_size=None,
+        verbose=False,
+    ):
+        """
+        Parameters:
+            * address: (host, port) to listen on, port 0 picks a free one
+            * data: FakeSpotifyData to serve, generated with seed 0 by default
+            * latency: Seconds added to every response
+            * jitter: Maximum random seconds added on top of `latency`
+            * page_size: Cap on the page size, below the Web API maximums
+            * verbose: Log every request
+        """
+        super().__init__(address, FakeSpotifyHandler)
+        self.data = data or FakeSpotifyData()
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.verbose = verbose
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_prefix(self):
+        return self.base_url + "/v1/"
+
+    @property
+    def accounts_url(self):
+        return self.base_url + "/"
+
+    def simulate_latency(self):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def start(self):
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--playlists", type=int, default=50)
+    parser.add_argument("--tracks", type=int, default=100000)
+    parser.add_argument("--max-playlist-length", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="seconds")
+    parser.add_argument("--page-size", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    data = FakeSpotifyData(
+        seed=args.seed,
+        playlists=args.playlists,
+        tracks=args.tracks,
+        max_playlist_length=args.max_playlist_length,
+    )
+    server = FakeSpotifyServer(
+        (args.host, args.port),
+        data=data,
+        latency=args.latency,
+        jitter=args.jitter,
+        page_size=args.page_size,
+        verbose=args.verbose,
+    )
+    print(f"Serving the fake Spotify API on {server.api_prefix}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
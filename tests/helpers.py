@@ -14,3 +14,15 @@ def get_spotify_playlist(spotify_object, playlist_name, username):
 
 def get_as_base64(url):
     return base64.b64encode(requests.get(url).content).decode("utf-8")
+
+
+def make_response(
+    status_code=200, body=b"{}", headers=None, url="https://api.spotify.com/v1/me"
+):
+    """A requests Response, as returned by a fake session"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = body
+    response.url = url
+    return response
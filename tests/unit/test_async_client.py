@@ -0,0 +1,151 @@
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from spotipy import (
+    AsyncSpotify,
+    RateLimiter,
+    SpotifyException,
+    SpotifyManager,
+    deadline,
+)
+from spotipy.exceptions import SpotifyTimeoutError
+
+
+def _make_client(handler, **kwargs):
+    session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncSpotify(auth="TOKEN", requests_session=session, **kwargs)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncSpotify(unittest.TestCase):
+    def test_endpoint_methods_return_decoded_json(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json={"id": "PLID", "name": "playlist"})
+
+        async def go():
+            async with _make_client(handler) as sp:
+                return await sp.playlist("PLID", fields="id,name")
+
+        result = _run(go())
+
+        self.assertEqual(result, {"id": "PLID", "name": "playlist"})
+        self.assertEqual(seen[0].url.path, "/v1/playlists/PLID")
+        self.assertEqual(seen[0].url.params["fields"], "id,name")
+        self.assertEqual(seen[0].headers["Authorization"], "Bearer TOKEN")
+
+    def test_query_string_in_url_is_kept(self):
+        def handler(request):
+            ids = request.url.params["ids"].split(",")
+            return httpx.Response(
+                200, json={"audio_features": [{"id": i} for i in ids]}
+            )
+
+        async def go():
+            async with _make_client(handler) as sp:
+                return await sp.audio_features(["a", "b"])
+
+        self.assertEqual(_run(go()), [{"id": "a"}, {"id": "b"}])
+
+    def test_error_raises_spotify_exception(self):
+        def handler(request):
+            return httpx.Response(404, json={"error": {"message": "not found"}})
+
+        async def go():
+            async with _make_client(handler) as sp:
+                return await sp.track("TRID")
+
+        with self.assertRaises(SpotifyException) as error:
+            _run(go())
+        self.assertEqual(error.exception.http_status, 404)
+
+    def test_retries_after_rate_limit(self):
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, json={"id": "TRID"}),
+        ]
+
+        def handler(request):
+            return responses.pop(0)
+
+        async def go():
+            async with _make_client(handler) as sp:
+                return await sp.track("TRID")
+
+        self.assertEqual(_run(go()), {"id": "TRID"})
+        self.assertEqual(responses, [])
+
+    def test_rate_limit_pause_stops_at_deadline(self):
+        limiter = RateLimiter(rate=None)
+        limiter.pause(3)
+
+        def handler(request):
+            return httpx.Response(200, json={"id": "TRID"})
+
+        async def go():
+            async with _make_client(handler, rate_limiter=limiter) as sp:
+                with deadline(0.5):
+                    return await sp.track("TRID")
+
+        with self.assertRaises(SpotifyTimeoutError):
+            _run(go())
+
+
+class TestAsyncSpotifyManager(unittest.TestCase):
+    def test_async_get_playlist_tracks_follows_next(self):
+        base = "https://api.spotify.com/v1/playlists/PLID/tracks"
+        pages = {
+            "0": {
+                "items": [{"track": {"id": "1", "is_local": False}}],
+                "next": base + "?offset=1",
+            },
+            "1": {
+                "items": [
+                    {"track": {"id": "2", "is_local": False}},
+                    {"track": {"id": "3", "is_local": True}},
+                ],
+                "next": None,
+            },
+        }
+
+        def handler(request):
+            offset = request.url.params.get("offset", "0")
+            return httpx.Response(200, content=json.dumps(pages[offset]))
+
+        async def go():
+            async with _make_client(handler) as sp:
+                manager = SpotifyManager("CLID", "CLISEC", "REDIR")
+                return await manager.async_get_playlist_tracks(sp, "PLID")
+
+        tracks = _run(go())
+        self.assertEqual([track["id"] for track in tracks], ["1", "2"])
+
+    def test_async_get_playlist_tracks_fetches_offsets(self):
+        base = "https://api.spotify.com/v1/playlists/PLID/tracks"
+
+        def handler(request):
+            offset = int(request.url.params.get("offset", "0"))
+            page = {
+                "items": [{"track": {"id": str(offset), "is_local": False}}],
+                "next": f"{base}?offset={offset + 1}&limit=1" if offset < 4 else None,
+                "total": 5,
+                "limit": 1,
+                "offset": offset,
+            }
+            return httpx.Response(200, json=page)
+
+        async def go():
+            async with _make_client(handler) as sp:
+                manager = SpotifyManager("CLID", "CLISEC", "REDIR", max_workers=3)
+                return await manager.async_get_playlist_tracks(sp, "PLID")
+
+        tracks = _run(go())
+        self.assertEqual([track["id"] for track in tracks], ["0", "1", "2", "3", "4"])
@@ -0,0 +1,71 @@
+import threading
+import time
+import unittest
+
+from spotipy import MicroBatcher
+
+
+def _run_in_threads(func, args):
+    results = [None] * len(args)
+    errors = [None] * len(args)
+
+    def target(i):
+        try:
+            results[i] = func(args[i])
+        except Exception as error:
+            errors[i] = error
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(len(args))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_keys_are_batched(self):
+        calls = []
+
+        def lookup(keys):
+            calls.append(keys)
+            return [{"id": key} for key in keys]
+
+        batcher = MicroBatcher(lookup, max_wait=0.1)
+        keys = ["a", "b", "c", "a"]
+        results, errors = _run_in_threads(batcher.submit, keys)
+
+        self.assertEqual(results, [{"id": key} for key in keys])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(calls[0]), ["a", "b", "c"])
+        self.assertEqual(batcher.stats(), {"batches": 1, "items": 4})
+
+    def test_full_batch_is_sent_straight_away(self):
+        calls = []
+
+        def lookup(keys):
+            calls.append(keys)
+            return keys
+
+        batcher = MicroBatcher(lookup, max_batch_size=3, max_wait=5)
+        start = time.monotonic()
+        results, errors = _run_in_threads(batcher.submit, list(range(6)))
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(results, list(range(6)))
+        self.assertEqual([len(keys) for keys in calls], [3, 3])
+
+    def test_errors_are_shared(self):
+        def lookup(keys):
+            time.sleep(0.01)
+            raise ValueError("boom")
+
+        batcher = MicroBatcher(lookup, max_wait=0.05)
+        results, errors = _run_in_threads(batcher.submit, ["a", "b"])
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_sequential_calls(self):
+        batcher = MicroBatcher(lambda keys: [k * 2 for k in keys], max_wait=0)
+        self.assertEqual(batcher.submit(1), 2)
+        self.assertEqual(batcher.submit(2), 4)
+        self.assertEqual(batcher.stats()["batches"], 2)
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from spotipy.cache_handler import CacheFileHandler, DjangoCacheHandler
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+TOKEN_INFO = {"access_token": "TOKEN", "expires_at": 1000}
+
+
+class TestCacheFileHandler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "token")
+        self.handler = CacheFileHandler(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing_file(self):
+        self.assertIsNone(self.handler.get_cached_token())
+
+    def test_round_trip(self):
+        self.handler.save_token_to_cache(TOKEN_INFO)
+        self.assertEqual(CacheFileHandler(self.path).get_cached_token(), TOKEN_INFO)
+        # only the cache and its lock file are left behind
+        self.assertEqual(sorted(os.listdir(self.directory)), ["token", "token.lock"])
+
+    def test_reads_from_memory_until_file_changes(self):
+        self.handler.save_token_to_cache(TOKEN_INFO)
+        self.handler.get_cached_token()
+        with mock.patch("spotipy.cache_handler.open") as mock_open:
+            self.assertEqual(self.handler.get_cached_token(), TOKEN_INFO)
+        mock_open.assert_not_called()
+
+        # written by another process
+        refreshed = dict(TOKEN_INFO, access_token="REFRESHED")
+        CacheFileHandler(self.path).save_token_to_cache(refreshed)
+        self.assertEqual(self.handler.get_cached_token(), refreshed)
+
+    def test_failed_write_keeps_previous_token(self):
+        self.handler.save_token_to_cache(TOKEN_INFO)
+        with mock.patch("spotipy.cache_handler.json.dump", side_effect=OSError):
+            self.handler.save_token_to_cache(dict(TOKEN_INFO, access_token="NEW"))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), TOKEN_INFO)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["token", "token.lock"])
+
+    def test_save_under_refresh_lock(self):
+        with self.handler.refresh_lock():
+            self.handler.save_token_to_cache(TOKEN_INFO)
+        self.assertEqual(self.handler.get_cached_token(), TOKEN_INFO)
+
+
+class TestDjangoCacheHandler(unittest.TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.cache = cache
+
+    def test_round_trip(self):
+        token_info = {"access_token": "TOKEN", "expires_at": time.time() + 3600}
+        DjangoCacheHandler("app").save_token_to_cache(token_info)
+        self.assertEqual(DjangoCacheHandler("app").get_cached_token(), token_info)
+        self.assertIsNone(DjangoCacheHandler("other").get_cached_token())
+
+    def test_ttl_from_expires_at(self):
+        handler = DjangoCacheHandler("app")
+        with mock.patch.object(self.cache, "set") as mock_set:
+            handler.save_token_to_cache(
+                {"access_token": "TOKEN", "expires_at": time.time() + 3600}
+            )
+            self.assertAlmostEqual(mock_set.call_args[1]["timeout"], 3600, delta=1)
+
+            # refresh tokens outlive access tokens
+            handler.save_token_to_cache(
+                {"access_token": "TOKEN", "refresh_token": "R", "expires_at": 0}
+            )
+            self.assertIsNone(mock_set.call_args[1]["timeout"])
+
+    def test_refresh_lock(self):
+        handler = DjangoCacheHandler("app", lock_timeout=0.1)
+        with handler.refresh_lock():
+            self.assertTrue(self.cache.get("spotipy-token:app:lock"))
+            start = time.monotonic()
+            # another process, giving up on the lock after lock_timeout
+            with DjangoCacheHandler("app", lock_timeout=0.1).refresh_lock():
+                self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertIsNone(self.cache.get("spotipy-token:app:lock"))
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from spotipy import Cassette, CassetteMiss, SpotifyManager
+from spotipy.cassette import cassette_key
+from tests.fake_server import FakeSpotifyData, FakeSpotifyServer
+
+
+def _make_manager(server=None):
+    prefix = server.api_prefix if server else "http://127.0.0.1:9/v1/"
+    accounts = server.accounts_url if server else "http://127.0.0.1:9/"
+    return SpotifyManager(
+        "ID",
+        "SECRET",
+        "http://127.0.0.1/callback",
+        api_prefix=prefix,
+        accounts_url=accounts,
+    )
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sync.json.gz")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_key_normalizes_params(self):
+        self.assertEqual(
+            cassette_key("GET", "https://api.spotify.com/v1/me?b=2&a=1"),
+            cassette_key("GET", "https://api.spotify.com/v1/me?a=1&b=2"),
+        )
+
+    def test_record_then_replay(self):
+        data = FakeSpotifyData(playlists=3, tracks=500, max_playlist_length=120)
+        server = FakeSpotifyServer(data=data, page_size=20).start()
+        try:
+            manager = _make_manager(server)
+            cassette = Cassette(self.path)
+            manager.use_cassette(cassette, replay=False)
+            playlist_id = data.playlist_ids[0]
+            recorded = list(
+                manager.iter_playlist_tracks(manager.app_client, playlist_id)
+            )
+            cassette.save()
+        finally:
+            server.stop()
+
+        with open(self.path, "rb") as f:
+            self.assertNotIn(b"fake-access-token", f.read())
+
+        # same URLs, but nothing is listening anymore
+        manager = _make_manager(server)
+        manager.use_cassette(Cassette(self.path), latency=0.01)
+        start = time.monotonic()
+        replayed = list(manager.iter_playlist_tracks(manager.app_client, playlist_id))
+        self.assertGreaterEqual(time.monotonic() - start, 0.01)
+        self.assertEqual(replayed, recorded)
+
+    def test_replay_miss(self):
+        manager = _make_manager()
+        manager.use_cassette(Cassette())
+        with self.assertRaises(CassetteMiss):
+            manager.user_client("TOKEN").me()
+        self.assertTrue(issubclass(CassetteMiss, requests.exceptions.ConnectionError))
+
+    def test_repeated_requests_replay_in_order(self):
+        cassette = Cassette()
+        for snapshot in ("A", "B"):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = json.dumps({"snapshot_id": snapshot}).encode()
+            cassette.record("GET", "http://x/v1/playlists/P", response)
+
+        bodies = [
+            cassette.play("GET", "http://x/v1/playlists/P")["body"] for _ in range(3)
+        ]
+        self.assertEqual(
+            [json.loads(b)["snapshot_id"] for b in bodies], ["A", "B", "B"]
+        )
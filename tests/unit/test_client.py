@@ -0,0 +1,72 @@
+import unittest
+
+from spotipy import Spotify
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+class TestBulkLookups(unittest.TestCase):
+    def test_tracks_bulk_chunks_dedupes_and_aligns(self):
+        sp = Spotify(auth="TOKEN", max_workers=3)
+        requested = []
+
+        def tracks(ids, market=None):
+            requested.append(list(ids))
+            return {"tracks": [None if i == "missing" else {"id": i} for i in ids]}
+
+        ids = [str(i) for i in range(120)] + ["spotify:track:5", "missing", "7"]
+        with mock.patch.object(sp, "tracks", side_effect=tracks):
+            results = sp.tracks_bulk(ids)
+
+        self.assertEqual(sorted(len(batch) for batch in requested), [21, 50, 50])
+        self.assertEqual(len(results), len(ids))
+        self.assertEqual([r["id"] for r in results[:120]], ids[:120])
+        self.assertEqual(results[120], {"id": "5"})
+        self.assertIsNone(results[121])
+        self.assertIs(results[122], results[7])
+
+    def test_albums_bulk_uses_smaller_batches(self):
+        sp = Spotify(auth="TOKEN")
+
+        def albums(ids):
+            return {"albums": [{"id": i} for i in ids]}
+
+        with mock.patch.object(sp, "albums", side_effect=albums) as mock_albums:
+            results = sp.albums_bulk([str(i) for i in range(45)])
+
+        self.assertEqual(mock_albums.call_count, 3)
+        self.assertEqual(len(results), 45)
+
+
+class TestSearchMarkets(unittest.TestCase):
+    @staticmethod
+    def _search(url, args=None, payload=None, **kwargs):
+        items = [f"{kwargs['market']}{i}" for i in range(kwargs["limit"])]
+        return {"tracks": {"items": items}}
+
+    def test_all_markets_are_searched(self):
+        sp = Spotify(auth="TOKEN", max_workers=4)
+        markets = ["GB", "FR", "DE", "US", "ES"]
+
+        with mock.patch.object(sp, "_get", side_effect=self._search):
+            with self.assertWarns(UserWarning):
+                results = sp.search_markets("q", limit=2, markets=markets)
+
+        self.assertEqual(list(results), markets)
+        self.assertEqual(results["DE"]["tracks"]["items"], ["DE0", "DE1"])
+
+    def test_total_is_respected(self):
+        sp = Spotify(auth="TOKEN", max_workers=4)
+        markets = ["GB", "FR", "DE", "US", "ES", "IT", "NL"]
+
+        with mock.patch.object(sp, "_get", side_effect=self._search):
+            with self.assertWarns(UserWarning):
+                results = sp.search_markets("q", limit=2, markets=markets, total=5)
+
+        self.assertEqual(list(results), ["GB", "FR", "DE"])
+        self.assertEqual(results["DE"]["tracks"]["items"], ["DE0"])
+        counts = [len(result["tracks"]["items"]) for result in results.values()]
+        self.assertEqual(sum(counts), 5)
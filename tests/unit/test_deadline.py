@@ -0,0 +1,123 @@
+import time
+import unittest
+
+import requests
+import urllib3
+
+from spotipy import AdaptiveConcurrencyLimiter, CircuitBreaker, RateLimiter, Spotify
+from spotipy.deadline import DeadlineRetry, deadline, remaining_time
+from spotipy.exceptions import SpotifyTimeoutError
+from spotipy.util import imap_bounded
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+class TestDeadline(unittest.TestCase):
+    def test_no_deadline(self):
+        self.assertIsNone(remaining_time())
+
+    def test_nested_deadline_cannot_extend(self):
+        with deadline(1):
+            with deadline(60):
+                self.assertLessEqual(remaining_time(), 1)
+            with deadline(0.5):
+                self.assertLessEqual(remaining_time(), 0.5)
+        self.assertIsNone(remaining_time())
+
+    def test_deadline_follows_worker_threads(self):
+        with deadline(30):
+            remaining = list(imap_bounded(lambda _: remaining_time(), range(3), 2))
+        self.assertTrue(all(r is not None and r <= 30 for r in remaining))
+
+    def test_retry_gives_up_before_deadline(self):
+        retry = DeadlineRetry(total=10, backoff_factor=10)
+        retry = retry.increment("GET", "/v1/me", error=urllib3.exceptions.HTTPError())
+        with deadline(1):
+            with self.assertRaises(urllib3.exceptions.MaxRetryError) as context:
+                retry.increment("GET", "/v1/me", error=urllib3.exceptions.HTTPError())
+        self.assertIsInstance(context.exception.reason, SpotifyTimeoutError)
+
+
+class TestSpotifyDeadline(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.session.request.return_value = make_response(200, b'{"id": "me"}')
+        self.sp = Spotify(
+            auth="TOKEN", requests_session=self.session, requests_timeout=10
+        )
+
+    def test_timeout_is_capped(self):
+        with deadline(2):
+            self.sp.me()
+        timeout = self.session.request.call_args[1]["timeout"]
+        self.assertLessEqual(timeout, 2)
+
+        self.sp.me()
+        self.assertEqual(self.session.request.call_args[1]["timeout"], 10)
+
+    def test_expired_deadline_stops_calls(self):
+        with deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(SpotifyTimeoutError):
+                self.sp.me()
+        self.session.request.assert_not_called()
+
+    def test_rate_limit_pause_stops_at_deadline(self):
+        limiter = RateLimiter(rate=None)
+        limiter.pause(3)
+        self.sp.rate_limiter = limiter
+        start = time.monotonic()
+        with deadline(0.5):
+            with self.assertRaises(SpotifyTimeoutError):
+                self.sp.me()
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.session.request.assert_not_called()
+
+    def test_timeout_after_deadline_is_reported(self):
+        def request(*args, **kwargs):
+            time.sleep(kwargs["timeout"])
+            raise requests.exceptions.ReadTimeout()
+
+        self.session.request.side_effect = request
+        with deadline(0.02):
+            with self.assertRaises(SpotifyTimeoutError):
+                self.sp.me()
+
+    def test_retry_deadline_is_reported(self):
+        error = requests.exceptions.ConnectionError(
+            urllib3.exceptions.MaxRetryError(None, "/v1/me", SpotifyTimeoutError())
+        )
+        self.session.request.side_effect = error
+        with deadline(5):
+            with self.assertRaises(SpotifyTimeoutError):
+                self.sp.me()
+
+    def test_deadline_timeouts_dont_count_as_failures(self):
+        def request(*args, **kwargs):
+            time.sleep(kwargs["timeout"])
+            raise requests.exceptions.ReadTimeout()
+
+        breaker = CircuitBreaker(failure_threshold=5)
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        self.sp.circuit_breaker = breaker
+        self.sp.concurrency_limiter = limiter
+        self.session.request.side_effect = request
+        for _ in range(5):
+            with deadline(0.01):
+                with self.assertRaises(SpotifyTimeoutError):
+                    self.sp.me()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+        self.assertEqual(limiter.limit, 8)
+        self.assertEqual(limiter.in_flight, 0)
+
+        # a timeout without a deadline is a real failure
+        self.sp.requests_timeout = 0.01
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.sp.me()
+        self.assertEqual(breaker.failures, 1)
+        self.assertLess(limiter.limit, 8)
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+
+from spotipy import SpotifyManager
+from tests.fake_server import (
+    FakeSpotifyData,
+    FakeSpotifyServer,
+    fake_id,
+    filter_fields,
+    parse_fields,
+)
+
+
+class TestFields(unittest.TestCase):
+    def test_nested_fields(self):
+        tree = parse_fields("items(track(id,artists(name))),total")
+        value = {
+            "items": [{"track": {"id": "a", "name": "b", "artists": [{"name": "c"}]}}],
+            "total": 1,
+            "next": None,
+        }
+        self.assertEqual(
+            filter_fields(value, tree),
+            {"items": [{"track": {"id": "a", "artists": [{"name": "c"}]}}], "total": 1},
+        )
+
+
+class TestFakeServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data = FakeSpotifyData(playlists=5, tracks=2000, max_playlist_length=300)
+        cls.server = FakeSpotifyServer(data=cls.data, page_size=30).start()
+        cls.manager = SpotifyManager(
+            "ID",
+            "SECRET",
+            "http://127.0.0.1/callback",
+            api_prefix=cls.server.api_prefix,
+            accounts_url=cls.server.accounts_url,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_data_is_deterministic(self):
+        other = FakeSpotifyData(playlists=5, tracks=2000, max_playlist_length=300)
+        self.assertEqual(other.playlist_lengths, self.data.playlist_lengths)
+        self.assertEqual(
+            other.playlist_track_numbers(1), self.data.playlist_track_numbers(1)
+        )
+
+    def test_playlists(self):
+        playlists = list(self.manager.iter_current_user_playlists("TOKEN"))
+        self.assertEqual([p["id"] for p in playlists], self.data.playlist_ids)
+
+    def test_playlist_tracks(self):
+        client = self.manager.app_client
+        for number, playlist_id in enumerate(self.data.playlist_ids):
+            tracks = list(self.manager.iter_playlist_tracks(client, playlist_id))
+            self.assertEqual(len(tracks), self.data.playlist_lengths[number])
+            self.assertEqual(
+                set(tracks[0]), {"id", "name", "artists", "album", "is_local"}
+            )
+
+    def test_snapshot(self):
+        playlist_id = self.data.playlist_ids[0]
+        result = self.manager.app_client.playlist(playlist_id, fields="snapshot_id")
+        self.assertEqual(result, {"snapshot_id": self.data.playlist(0)["snapshot_id"]})
+
+    def test_track_features(self):
+        client = self.manager.app_client
+        playlist_id = self.data.playlist_ids[0]
+        track_ids = [
+            t["id"] for t in self.manager.iter_playlist_tracks(client, playlist_id)
+        ]
+        features = self.manager.get_track_features(track_ids + ["unknown"])
+        self.assertEqual([f["id"] for f in features[:-1]], track_ids)
+        self.assertIsNone(features[-1])
+
+    def test_latency(self):
+        self.server.latency = 0.05
+        try:
+            start = time.monotonic()
+            self.manager.user_client("TOKEN").me()
+            self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        finally:
+            self.server.latency = 0
+
+    def test_single_track_features_are_batched(self):
+        track_ids = [fake_id("track", i) for i in range(10)]
+        batches = self.manager.features_batcher.stats()["batches"]
+        threads = [
+            threading.Thread(
+                target=self.manager.get_single_track_features, args=(track_id,)
+            )
+            for track_id in track_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(
+            self.manager.features_batcher.stats()["batches"], batches + 2
+        )
+        features = self.manager.get_single_track_features(track_ids[0])
+        self.assertEqual(features["id"], track_ids[0])
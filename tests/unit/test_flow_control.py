@@ -0,0 +1,112 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from spotipy import AdaptiveConcurrencyLimiter, CircuitBreaker, Spotify
+from spotipy.exceptions import SpotifyException
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+    def test_window_grows_on_success(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01, 200)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_window_shrinks_once_per_episode(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_target=1)
+        for status in (429, 503, None):
+            limiter.acquire()
+            limiter.release(0.01, status)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_slow_responses_shrink_window(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_target=1)
+        limiter.acquire()
+        limiter.release(1.5, 200)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_acquire_blocks_when_full(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        limiter.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        thread.start()
+
+        self.assertFalse(acquired.wait(0.05))
+        limiter.release(0.01, 200)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        for status in (500, None):
+            breaker.before_call()
+            breaker.record(status)
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(SpotifyException) as context:
+            breaker.before_call()
+        self.assertEqual(context.exception.reason, "CIRCUIT_OPEN")
+
+    def test_client_errors_are_not_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        for status in (500, 404, 500):
+            breaker.before_call()
+            breaker.record(status)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+        breaker.before_call()
+        breaker.record(502)
+        time.sleep(0.02)
+
+        breaker.before_call()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(SpotifyException):
+            breaker.before_call()
+
+        breaker.record(200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.before_call()
+
+
+class TestSpotifyFlowControl(unittest.TestCase):
+    def test_open_circuit_fails_fast(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = requests.exceptions.ConnectionError()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        sp = Spotify(auth="TOKEN", requests_session=session, circuit_breaker=breaker)
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                sp.me()
+        with self.assertRaises(SpotifyException):
+            sp.me()
+        self.assertEqual(session.request.call_count, 2)
+
+    def test_limiter_sees_every_response(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value = make_response(200, b'{"id": "me"}')
+        limiter = AdaptiveConcurrencyLimiter()
+        sp = Spotify(
+            auth="TOKEN", requests_session=session, concurrency_limiter=limiter
+        )
+
+        with mock.patch.object(limiter, "release", wraps=limiter.release) as release:
+            self.assertEqual(sp.me(), {"id": "me"})
+
+        self.assertEqual(release.call_args[0][1], 200)
+        self.assertEqual(limiter.in_flight, 0)
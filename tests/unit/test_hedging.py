@@ -0,0 +1,139 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from spotipy import HedgingPolicy, Spotify, hedged_requests, hedging_enabled
+from tests.helpers import make_response
+
+URL = "https://api.spotify.com/v1/playlists/37i9dQZF1DXcBWIGoYBM5M"
+
+
+class SlowFirstSession(requests.Session):
+    """Answers the first request after `slow` seconds, the others at once"""
+
+    def __init__(self, slow):
+        super().__init__()
+        self.slow = slow
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            time.sleep(self.slow)
+            return make_response(200, b'{"answer": "original"}')
+        return make_response(200, b'{"answer": "hedge"}')
+
+
+def trained_policy(**kwargs):
+    policy = HedgingPolicy(min_samples=5, min_delay=0, **kwargs)
+    for _ in range(5):
+        policy.observe(URL, 0.01)
+    return policy
+
+
+class TestHedgingPolicy(unittest.TestCase):
+    def test_learns_delay_per_endpoint(self):
+        policy = HedgingPolicy(min_samples=5, min_delay=0)
+        for latency in [0.01, 0.02, 0.03, 0.04, 0.05]:
+            self.assertIsNone(policy.hedge_delay(URL))
+            policy.observe(URL, latency)
+        self.assertEqual(policy.hedge_delay(URL), 0.05)
+        self.assertIsNone(policy.hedge_delay(URL + "/tracks"))
+
+    def test_delay_depends_on_page_size(self):
+        policy = HedgingPolicy(min_samples=1, min_delay=0)
+        policy.observe(URL + "/tracks?offset=100&limit=100", 0.5)
+        policy.observe(URL + "/tracks", 0.05, {"limit": 10})
+        self.assertEqual(policy.hedge_delay(URL + "/tracks", {"limit": 100}), 0.5)
+        self.assertEqual(policy.hedge_delay(URL + "/tracks?limit=10"), 0.05)
+        self.assertIsNone(policy.hedge_delay(URL + "/tracks", {"limit": 50}))
+
+    def test_budget_caps_hedges(self):
+        policy = trained_policy(max_extra=0.25, burst=1)
+        allowed = 0
+        for _ in range(40):
+            policy.hedge_delay(URL)
+            allowed += policy.try_hedge()
+        self.assertEqual(allowed, 10)
+        self.assertEqual(policy.stats()["hedges"], 10)
+
+    def test_context(self):
+        self.assertFalse(hedging_enabled())
+        with hedged_requests():
+            self.assertTrue(hedging_enabled())
+            with hedged_requests(False):
+                self.assertFalse(hedging_enabled())
+        self.assertFalse(hedging_enabled())
+
+
+class TestHedgedRequests(unittest.TestCase):
+    def test_hedge_wins(self):
+        session = SlowFirstSession(slow=0.5)
+        policy = trained_policy(max_extra=1)
+        sp = Spotify(auth="TOKEN", requests_session=session, hedging=policy)
+        with hedged_requests():
+            self.assertEqual(sp._get(URL), {"answer": "hedge"})
+        self.assertEqual(session.calls, 2)
+        self.assertEqual(policy.stats()["wins"], 1)
+
+    def test_not_hedged_outside_context(self):
+        session = SlowFirstSession(slow=0.05)
+        sp = Spotify(
+            auth="TOKEN", requests_session=session, hedging=trained_policy(max_extra=1)
+        )
+        self.assertEqual(sp._get(URL), {"answer": "original"})
+        self.assertEqual(session.calls, 1)
+
+    def test_no_hedge_without_budget(self):
+        session = SlowFirstSession(slow=0.05)
+        sp = Spotify(
+            auth="TOKEN", requests_session=session, hedging=trained_policy(max_extra=0)
+        )
+        with hedged_requests():
+            self.assertEqual(sp._get(URL), {"answer": "original"})
+        self.assertEqual(session.calls, 1)
+
+    def test_error_waits_for_other_request(self):
+        calls = []
+
+        class Session(requests.Session):
+            def request(self, method, url, **kwargs):
+                calls.append(url)
+                if len(calls) == 1:
+                    time.sleep(0.1)
+                    raise requests.exceptions.ConnectionError("reset")
+                return make_response(200, b'{"answer": "hedge"}')
+
+        sp = Spotify(
+            auth="TOKEN",
+            requests_session=Session(),
+            hedging=trained_policy(max_extra=1),
+        )
+        with hedged_requests():
+            self.assertEqual(sp._get(URL), {"answer": "hedge"})
+
+    def test_threads_are_shared_and_bounded(self):
+        session = SlowFirstSession(slow=0)
+        policy = trained_policy(max_extra=1, max_threads=2)
+        sp = Spotify(auth="TOKEN", requests_session=session, hedging=policy)
+        before = threading.active_count()
+        with hedged_requests():
+            for _ in range(10):
+                sp._get(URL)
+        self.assertLessEqual(threading.active_count(), before + 2)
+
+    def test_sent_directly_while_threads_are_busy(self):
+        session = SlowFirstSession(slow=0.05)
+        policy = trained_policy(max_extra=1, max_threads=1)
+        sp = Spotify(auth="TOKEN", requests_session=session, hedging=policy)
+        busy = policy.submit(time.sleep, 0.2)
+        with hedged_requests():
+            self.assertEqual(sp._get(URL), {"answer": "original"})
+        self.assertEqual(session.calls, 1)
+        self.assertEqual(policy.stats()["hedges"], 0)
+        busy.result()
@@ -0,0 +1,104 @@
+import unittest
+
+import httpx
+import requests
+import urllib3
+
+from spotipy import HTTP2Adapter, Spotify
+from spotipy.client import build_session
+from tests.fake_server import FakeSpotifyServer
+
+
+def _client(handler):
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    # httpx's own default, which its HTTP/2 connections leave out
+    del client.headers["Connection"]
+    return client
+
+
+def _session(handler, retries=None):
+    session = requests.Session()
+    adapter = HTTP2Adapter(max_retries=retries, client=_client(handler))
+    session.mount("https://", adapter)
+    return session
+
+
+class TestHTTP2Adapter(unittest.TestCase):
+    def test_request_and_response(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200, json={"id": "me"}, headers={"ETag": '"1"'})
+
+        sp = Spotify(auth="TOKEN", requests_session=_session(handler))
+        self.assertEqual(sp.me(), {"id": "me"})
+        self.assertEqual(seen[0].headers["Authorization"], "Bearer TOKEN")
+        # HTTP/2 forbids connection-specific headers
+        self.assertNotIn("Connection", seen[0].headers)
+
+    def test_status_retries(self):
+        statuses = iter([503, 502, 200])
+
+        def handler(request):
+            return httpx.Response(next(statuses), json={})
+
+        retry = urllib3.Retry(
+            total=5, status=5, backoff_factor=0, status_forcelist=[502, 503]
+        )
+        response = _session(handler, retry).get("https://api.spotify.com/v1/me")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.raw.retries.history), 2)
+
+    def test_retries_exhausted(self):
+        def handler(request):
+            return httpx.Response(503, json={})
+
+        retry = urllib3.Retry(total=1, backoff_factor=0, status_forcelist=[503])
+        with self.assertRaises(requests.exceptions.RetryError):
+            _session(handler, retry).get("https://api.spotify.com/v1/me")
+
+    def test_connection_errors(self):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            _session(handler).get("https://api.spotify.com/v1/me")
+
+    def test_read_timeout_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        session = build_session(retries=10, http2=True)
+        session.get_adapter("https://").client = _client(handler)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            session.post("https://api.spotify.com/v1/playlists/ID/tracks", data="{}")
+        # the server may have added the tracks already
+        self.assertEqual(calls, ["POST"])
+
+    def test_connect_errors_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            if len(calls) < 3:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(201, json={})
+
+        session = build_session(retries=10, backoff_factor=0, http2=True)
+        session.get_adapter("https://").client = _client(handler)
+        response = session.post("https://api.spotify.com/v1/playlists/ID/tracks")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(calls), 3)
+
+    def test_against_fake_server(self):
+        server = FakeSpotifyServer().start()
+        try:
+            sp = Spotify(auth="TOKEN", requests_session=build_session(http2=True))
+            sp.prefix = server.api_prefix
+            self.assertEqual(sp.me()["id"], "fake_user")
+        finally:
+            server.stop()
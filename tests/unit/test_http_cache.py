@@ -0,0 +1,161 @@
+import os
+import tempfile
+import time
+import unittest
+
+import requests
+
+from spotipy import FileHTTPCache, MemoryHTTPCache, Spotify, SpotifyClientCredentials
+from spotipy.http_cache import CacheEntry
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+def _make_client(responses, cache):
+    session = mock.Mock(spec=requests.Session)
+    session.request.side_effect = responses
+    return Spotify(auth="TOKEN", requests_session=session, http_cache=cache)
+
+
+class TestCacheEntry(unittest.TestCase):
+    def test_no_store(self):
+        response = make_response(
+            200, body=b"", headers={"ETag": "1", "Cache-Control": "no-store"}
+        )
+        self.assertIsNone(CacheEntry.from_response(response))
+
+    def test_max_age(self):
+        response = make_response(
+            200, headers={"Cache-Control": "public, max-age=60"}, body=b"{}"
+        )
+        entry = CacheEntry.from_response(response)
+        self.assertTrue(entry.is_fresh())
+        self.assertFalse(entry.is_fresh(time.time() + 61))
+
+    def test_uncacheable_without_etag_or_max_age(self):
+        self.assertIsNone(CacheEntry.from_response(make_response(200, body=b"{}")))
+
+
+class TestMemoryHTTPCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = MemoryHTTPCache(max_size=10)
+        cache.set("a", CacheEntry(b"aaaa", "1", None))
+        cache.set("b", CacheEntry(b"bbbb", "2", None))
+        cache.get("a")
+        cache.set("c", CacheEntry(b"cccc", "3", None))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertLessEqual(cache.size, 10)
+
+
+class TestFileHTTPCache(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FileHTTPCache(directory)
+            cache.set("key", CacheEntry(b'{"a": 1}', '"etag"', None))
+            self.assertEqual(cache.get("key"), CacheEntry(b'{"a": 1}', '"etag"', None))
+            self.assertIsNone(cache.get("other"))
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FileHTTPCache(directory, max_size=300)
+            for i, key in enumerate(["a", "b", "c"]):
+                cache.set(key, CacheEntry(b"x" * 50, None, None))
+                # mtimes can be coarse
+                path = cache._path(key)
+                os.utime(path, (1000 + i, 1000 + i))
+            cache.get("a")
+            cache.set("d", CacheEntry(b"x" * 50, None, None))
+
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNotNone(cache.get("d"))
+            self.assertLessEqual(cache.size, 300)
+            self.assertEqual(FileHTTPCache(directory).size, cache.size)
+
+
+class TestSpotifyHTTPCache(unittest.TestCase):
+    def test_revalidates_with_etag(self):
+        body = b'{"id": "PLID", "name": "playlist"}'
+        sp = _make_client(
+            [
+                make_response(200, headers={"ETag": '"v1"'}, body=body),
+                make_response(304, body=b"", headers={"ETag": '"v1"'}),
+            ],
+            MemoryHTTPCache(),
+        )
+
+        first = sp.playlist("PLID")
+        second = sp.playlist("PLID")
+
+        self.assertEqual(first, second)
+        request = sp._session.request
+        self.assertNotIn("If-None-Match", request.call_args_list[0][1]["headers"])
+        self.assertEqual(
+            request.call_args_list[1][1]["headers"]["If-None-Match"], '"v1"'
+        )
+
+    def test_fresh_entry_skips_request(self):
+        headers = {"Cache-Control": "max-age=60"}
+        sp = _make_client(
+            [make_response(200, headers=headers, body=b'{"id": 1}')], MemoryHTTPCache()
+        )
+
+        self.assertEqual(sp.track("TRID"), {"id": 1})
+        self.assertEqual(sp.track("TRID"), {"id": 1})
+        self.assertEqual(sp._session.request.call_count, 1)
+
+    def test_entries_are_per_user(self):
+        cache = MemoryHTTPCache()
+        headers = {"Cache-Control": "max-age=60"}
+        sp = _make_client(
+            [
+                make_response(200, headers=headers, body=b'{"id": "first"}'),
+                make_response(200, headers=headers, body=b'{"id": "second"}'),
+            ],
+            cache,
+        )
+
+        self.assertEqual(sp.me(), {"id": "first"})
+        sp.set_auth("OTHER_TOKEN")
+        self.assertEqual(sp.me(), {"id": "second"})
+
+    def test_entries_survive_token_refresh(self):
+        headers = {"ETag": '"v1"'}
+        sp = _make_client(
+            [
+                make_response(200, headers=headers, body=b'{"id": "PLID"}'),
+                make_response(304, body=b"", headers=headers),
+            ],
+            MemoryHTTPCache(),
+        )
+        sp.cache_identity = "user:spotify_id"
+
+        sp.playlist("PLID")
+        sp.set_auth("REFRESHED_TOKEN")
+        self.assertEqual(sp.playlist("PLID"), {"id": "PLID"})
+        headers = sp._session.request.call_args[1]["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+
+    def test_app_entries_keyed_on_client_id(self):
+        cache = MemoryHTTPCache()
+        credentials = mock.Mock(spec=SpotifyClientCredentials, client_id="CLIENT")
+        credentials.get_access_token.side_effect = ["TOKEN1", "TOKEN2"]
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = [
+            make_response(
+                200, headers={"Cache-Control": "max-age=60"}, body=b'{"id": 1}'
+            )
+        ]
+        sp = Spotify(
+            auth_manager=credentials, requests_session=session, http_cache=cache
+        )
+
+        self.assertEqual(sp.track("TRID"), {"id": 1})
+        self.assertEqual(sp.track("TRID"), {"id": 1})
+        self.assertEqual(session.request.call_count, 1)
@@ -0,0 +1,69 @@
+import json
+import unittest
+
+import requests
+
+from spotipy import SingleFlight, Spotify, StdlibJSONCodec, fastest_json_codec
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CountingCodec(StdlibJSONCodec):
+    def __init__(self):
+        self.loaded = []
+        self.dumped = []
+
+    def loads(self, data):
+        self.loaded.append(data)
+        return super().loads(data)
+
+    def dumps(self, obj):
+        self.dumped.append(obj)
+        return super().dumps(obj)
+
+
+class TestJSONCodec(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+
+    def test_codec_is_used_both_ways(self):
+        self.session.request.return_value = make_response(201, b'{"snapshot_id": "S"}')
+        codec = CountingCodec()
+        sp = Spotify(auth="TOKEN", requests_session=self.session, json_codec=codec)
+
+        result = sp.playlist_add_items("PLID", ["4iV5W9uYEdYUVa79Axb7Rh"])
+
+        self.assertEqual(result, {"snapshot_id": "S"})
+        self.assertEqual(codec.loaded, [b'{"snapshot_id": "S"}'])
+        sent = json.loads(self.session.request.call_args[1]["data"])
+        self.assertEqual(codec.dumped, [sent])
+
+    def test_empty_body(self):
+        self.session.request.return_value = make_response(204, b"")
+        sp = Spotify(auth="TOKEN", requests_session=self.session)
+        self.assertIsNone(sp.pause_playback())
+
+    def test_raw_per_call(self):
+        self.session.request.return_value = make_response(200, b'{"items": []}')
+        sp = Spotify(
+            auth="TOKEN", requests_session=self.session, single_flight=SingleFlight()
+        )
+        self.assertEqual(sp.playlist_items("pl", raw=True), b'{"items": []}')
+        # other calls, including ones the client makes itself, still decode
+        self.assertEqual(sp.playlist_items("pl"), {"items": []})
+        self.assertEqual(sp.next({"next": "https://x/y"}, raw=True), b'{"items": []}')
+
+    def test_fastest_codec(self):
+        codec = fastest_json_codec()
+        self.assertEqual(codec.loads(b'{"a": [1]}'), {"a": [1]})
+        if orjson is None:
+            self.assertIsInstance(codec, StdlibJSONCodec)
@@ -0,0 +1,199 @@
+import threading
+import time
+import unittest
+
+from spotipy import SpotifyManager
+from spotipy.util import chunked, imap_bounded, offset_page_urls
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+def _make_manager(**kwargs):
+    return SpotifyManager("CLID", "CLISEC", "REDIR", **kwargs)
+
+
+class FakePagingClient:
+    """Serves `total` items as offset-based pages of `limit` items"""
+
+    base = "https://api.spotify.com/v1/playlists/PLID/tracks"
+
+    def __init__(self, total, limit):
+        self.total = total
+        self.limit = limit
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def page(self, offset):
+        with self.lock:
+            self.requested.append(offset)
+        end = min(offset + self.limit, self.total)
+        next_url = None
+        if end < self.total:
+            next_url = f"{self.base}?offset={end}&limit={self.limit}&fields=items"
+        return {
+            "items": [
+                {"track": {"id": str(i), "is_local": False}} for i in range(offset, end)
+            ],
+            "next": next_url,
+            "total": self.total,
+            "limit": self.limit,
+            "offset": offset,
+        }
+
+    def playlist_items(self, playlist_id, limit, fields):
+        return self.page(0)
+
+    def _get(self, url):
+        # make later pages finish first to check ordering
+        offset = int(url.split("offset=")[1].split("&")[0])
+        time.sleep(0.01 * (self.total - offset) / self.total)
+        return self.page(offset)
+
+    def next(self, result):
+        if result["next"]:
+            return self._get(result["next"])
+
+
+class TestOffsetPageUrls(unittest.TestCase):
+    def test_computes_remaining_offsets(self):
+        page = {
+            "next": "https://api.spotify.com/v1/me/playlists?offset=50&limit=50",
+            "total": 160,
+            "limit": 50,
+            "offset": 0,
+        }
+        urls = offset_page_urls(page)
+        self.assertEqual(len(urls), 3)
+        self.assertIn("offset=150", urls[-1])
+        self.assertIn("limit=50", urls[-1])
+
+    def test_last_page(self):
+        self.assertEqual(offset_page_urls({"next": None}), [])
+
+    def test_missing_total(self):
+        self.assertIsNone(offset_page_urls({"next": "https://x/?offset=1"}))
+
+
+class TestImapBounded(unittest.TestCase):
+    def test_keeps_input_order(self):
+        def slow_square(x):
+            time.sleep(0.001 * (10 - x))
+            return x * x
+
+        results = list(imap_bounded(slow_square, range(10), max_workers=4))
+        self.assertEqual(results, [x * x for x in range(10)])
+
+    def test_read_ahead_is_bounded(self):
+        started = []
+        results = imap_bounded(started.append, range(100), max_workers=2)
+        next(results)
+        time.sleep(0.01)
+        self.assertLessEqual(len(started), 4)
+        results.close()
+
+
+class TestPagination(unittest.TestCase):
+    def test_get_playlist_tracks_fetches_every_page_in_order(self):
+        client = FakePagingClient(total=523, limit=50)
+        manager = _make_manager(max_workers=4)
+
+        tracks = manager.get_playlist_tracks(client, "PLID")
+
+        self.assertEqual([tr["id"] for tr in tracks], [str(i) for i in range(523)])
+        self.assertEqual(sorted(client.requested), list(range(0, 523, 50)))
+
+    def test_iter_playlist_tracks_reads_ahead_lazily(self):
+        client = FakePagingClient(total=10000, limit=50)
+        manager = _make_manager(max_workers=2, read_ahead=3)
+
+        tracks = manager.iter_playlist_tracks(client, "PLID")
+        self.assertEqual(next(tracks)["id"], "0")
+        time.sleep(0.05)
+
+        # the first page, plus at most `read_ahead` pages in flight
+        self.assertLessEqual(len(client.requested), 4)
+        tracks.close()
+
+    def test_falls_back_to_next_links(self):
+        client = mock.Mock()
+        client.next.side_effect = [{"items": [2, 3], "next": None}]
+        manager = _make_manager()
+
+        items = manager._next_until_end(client, {"items": [1], "next": "URL"})
+
+        self.assertEqual(items, [1, 2, 3])
+
+
+class TestTrackFeatures(unittest.TestCase):
+    def test_chunked(self):
+        self.assertEqual(chunked(range(5), 2), [[0, 1], [2, 3], [4]])
+        self.assertEqual(chunked([], 2), [])
+
+    def test_features_are_batched_and_in_order(self):
+        manager = _make_manager(max_workers=4)
+        batches = []
+
+        def audio_features(track_ids):
+            batches.append(len(track_ids))
+            time.sleep(0.001 * len(track_ids))
+            return [{"id": track_id} for track_id in track_ids]
+
+        track_ids = [str(i) for i in range(1234)]
+        with mock.patch.object(
+            manager.app_client, "audio_features", side_effect=audio_features
+        ):
+            features = manager.get_track_features(track_ids)
+
+        self.assertEqual([f["id"] for f in features], track_ids)
+        self.assertEqual(sorted(batches), [34] + [100] * 12)
+
+
+class TestSharedSession(unittest.TestCase):
+    def test_user_clients_share_the_pool(self):
+        manager = _make_manager(pool_maxsize=4)
+        first = manager.user_client("TOKEN1")
+        second = manager.user_client("TOKEN2")
+
+        self.assertIs(first._session, manager.session)
+        self.assertIs(second._session, manager.session)
+        self.assertIs(manager.app_client._session, manager.session)
+        self.assertEqual(first._auth_headers(), {"Authorization": "Bearer TOKEN1"})
+
+        adapter = manager.session.get_adapter("https://")
+        self.assertEqual(adapter._pool_maxsize, 4)
+
+    def test_freeing_a_client_keeps_the_pool_open(self):
+        manager = _make_manager()
+        client = manager.user_client("TOKEN")
+        with mock.patch.object(manager.session, "close") as close:
+            del client
+        close.assert_not_called()
+
+    def test_custom_retries_use_their_own_session(self):
+        manager = _make_manager(retries=10)
+        client = manager.user_client("TOKEN", retries=1)
+        self.assertIsNot(client._session, manager.session)
+
+    def test_clients_share_the_settings(self):
+        manager = _make_manager(http_cache=object())
+        clients = [
+            manager.app_client,
+            manager.user_client("TOKEN"),
+            manager.async_app_client(),
+            manager.async_user_client("TOKEN"),
+        ]
+        for client in clients:
+            self.assertIs(client.rate_limiter, manager.rate_limiter)
+            self.assertIs(client.circuit_breaker, manager.circuit_breaker)
+            self.assertIs(client.json_codec, manager.json_codec)
+        for client in clients[:2]:
+            self.assertIs(client.http_cache, manager.http_cache)
+            self.assertIs(client.hedging, manager.hedging)
+        self.assertIs(clients[3].single_flight, manager.async_single_flight)
+
+    def test_pool_stats(self):
+        manager = _make_manager()
+        self.assertEqual(manager.pool_stats(), [])
@@ -0,0 +1,102 @@
+import unittest
+
+import requests
+
+from spotipy import MemoryMetricsSink, RateLimiter, Spotify
+from spotipy.metrics import RequestEvent, count_calls, endpoint_template
+from spotipy.util import imap_bounded
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+def _event(latency, status=200, endpoint="me"):
+    return RequestEvent(endpoint, "GET", status, latency, 0, 10, 0.001)
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    def test_ids_are_replaced(self):
+        self.assertEqual(
+            endpoint_template(
+                "https://api.spotify.com/v1/playlists/37i9dQZF1DXcBWIGoYBM5M/tracks"
+                "?offset=100"
+            ),
+            "playlists/{id}/tracks",
+        )
+        self.assertEqual(
+            endpoint_template("https://api.spotify.com/v1/users/some.user/playlists"),
+            "users/{id}/playlists",
+        )
+        self.assertEqual(
+            endpoint_template("https://api.spotify.com/v1/me/playlists"),
+            "me/playlists",
+        )
+
+
+class TestMemoryMetricsSink(unittest.TestCase):
+    def test_percentiles(self):
+        sink = MemoryMetricsSink()
+        for i in range(1, 101):
+            sink.record(_event(i / 100))
+        sink.record(_event(0.5, status=500, endpoint="tracks"))
+
+        summary = sink.summary()
+        self.assertEqual(set(summary), {"GET me", "GET tracks"})
+        self.assertEqual(summary["GET me"]["count"], 100)
+        self.assertEqual(summary["GET me"]["errors"], 0)
+        self.assertEqual(summary["GET me"]["p50"], 0.5)
+        self.assertEqual(summary["GET me"]["p95"], 0.95)
+        self.assertEqual(summary["GET me"]["p99"], 0.99)
+        self.assertEqual(summary["GET me"]["response_bytes"], 1000)
+        self.assertEqual(summary["GET tracks"]["errors"], 1)
+
+    def test_samples_are_bounded(self):
+        sink = MemoryMetricsSink(max_samples=10)
+        for i in range(100):
+            sink.record(_event(i))
+        self.assertEqual(sink.summary()["GET me"]["count"], 100)
+        self.assertEqual(sink.summary()["GET me"]["p50"], 94)
+
+
+class TestSpotifyMetrics(unittest.TestCase):
+    def test_requests_are_recorded(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = [
+            make_response(429, headers={"Retry-After": "0"}),
+            make_response(200, b'{"id": "37i9dQZF1DXcBWIGoYBM5M"}'),
+            make_response(404, b'{"error": {"message": "Not found"}}'),
+        ]
+        sink = MemoryMetricsSink()
+        sp = Spotify(
+            auth="TOKEN",
+            requests_session=session,
+            rate_limiter=RateLimiter(rate=1000),
+            metrics=sink,
+        )
+
+        with count_calls() as counter:
+            sp.playlist("37i9dQZF1DXcBWIGoYBM5M")
+            with self.assertRaises(Exception):
+                sp.playlist("37i9dQZF1DXcBWIGoYBM5M")
+
+        summary = sink.summary()["GET playlists/{id}"]
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["retries"], 1)
+        self.assertEqual(counter.calls, 2)
+
+    def test_calls_are_counted_across_threads(self):
+        session = mock.Mock(spec=requests.Session)
+        session.request.return_value = make_response(200)
+        sp = Spotify(auth="TOKEN", requests_session=session)
+
+        with count_calls() as outer:
+            with count_calls() as inner:
+                list(imap_bounded(lambda _: sp.me(), range(5), max_workers=3))
+            sp.me()
+
+        self.assertEqual(inner.calls, 5)
+        self.assertEqual(outer.calls, 6)
@@ -0,0 +1,99 @@
+import importlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import requests
+
+from spotipy import Spotify, util
+from spotipy.rate_limit import FileRateLimiter, RateLimiter, get_rate_limiter
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(rate=1000, burst=5)
+        for _ in range(5):
+            self.assertEqual(limiter.reserve(), 0)
+        self.assertGreater(limiter.reserve(), 0)
+
+    def test_pause_blocks_everyone(self):
+        limiter = RateLimiter(rate=1000, burst=5)
+        limiter.pause(0.05)
+        self.assertGreater(limiter.reserve(), 0.03)
+
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+    def test_acquire_timeout(self):
+        limiter = RateLimiter(rate=1000, burst=5)
+        limiter.pause(3)
+        start = time.monotonic()
+        self.assertFalse(limiter.acquire(timeout=0.1))
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_unlimited_rate_still_pauses(self):
+        limiter = RateLimiter()
+        for _ in range(1000):
+            self.assertEqual(limiter.reserve(), 0)
+        limiter.pause(0.05)
+        self.assertGreater(limiter.reserve(), 0.03)
+
+    def test_file_limiter_shares_state(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "limit")
+            first = FileRateLimiter(path, rate=0.001, burst=2)
+            second = FileRateLimiter(path, rate=0.001, burst=2)
+
+            self.assertEqual(first.reserve(), 0)
+            self.assertEqual(second.reserve(), 0)
+            self.assertGreater(first.reserve(), 0)
+
+    def test_registry_is_keyed(self):
+        self.assertIs(get_rate_limiter("KEY1"), get_rate_limiter("KEY1"))
+        self.assertIsNot(get_rate_limiter("KEY1"), get_rate_limiter("KEY2"))
+
+
+class TestSpotifyRateLimiting(unittest.TestCase):
+    def test_429_pauses_shared_limiter(self):
+        limiter = RateLimiter(rate=1000)
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = [
+            make_response(429, headers={"Retry-After": "0.01"}),
+            make_response(200, body=b'{"id": "me"}'),
+        ]
+        sp = Spotify(auth="TOKEN", requests_session=session, rate_limiter=limiter)
+
+        with mock.patch.object(limiter, "pause", wraps=limiter.pause) as pause:
+            self.assertEqual(sp.me(), {"id": "me"})
+
+        pause.assert_called_once_with(0.01)
+        self.assertEqual(session.request.call_count, 2)
+
+    def test_urllib3_does_not_retry_429_with_limiter(self):
+        sp = Spotify(auth="TOKEN", rate_limiter=RateLimiter())
+        retry = sp._session.get_adapter("https://").max_retries
+        self.assertNotIn(429, retry.status_forcelist)
+
+
+class TestFileLock(unittest.TestCase):
+    def test_without_fcntl(self):
+        msvcrt = mock.Mock(LK_LOCK=1, LK_UNLCK=0)
+        try:
+            with mock.patch.dict(sys.modules, {"fcntl": None, "msvcrt": msvcrt}):
+                importlib.reload(util)
+                with tempfile.TemporaryDirectory() as directory:
+                    with util.file_lock(os.path.join(directory, "lock")):
+                        msvcrt.locking.assert_called_once_with(mock.ANY, 1, 1)
+            msvcrt.locking.assert_called_with(mock.ANY, 0, 1)
+        finally:
+            importlib.reload(util)
+        self.assertIsNotNone(util.fcntl)
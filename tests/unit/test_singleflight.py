@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import requests
+
+from spotipy import AsyncSingleFlight, SingleFlight, Spotify, deadline
+from spotipy.exceptions import SpotifyTimeoutError
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+def _run_in_threads(func, count):
+    results = [None] * count
+    errors = [None] * count
+
+    def target(i):
+        try:
+            results[i] = func()
+        except Exception as error:
+            errors[i] = error
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_are_coalesced(self):
+        flight = SingleFlight()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"items": [1, 2]}
+
+        results, errors = _run_in_threads(lambda: flight.do("key", slow_call), 5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"items": [1, 2]}] * 5)
+        self.assertEqual(flight.stats(), {"calls": 1, "hits": 4, "waiters": 0})
+        # everyone gets their own copy
+        self.assertEqual(len({id(result) for result in results}), 5)
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        def failing_call():
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        results, errors = _run_in_threads(lambda: flight.do("key", failing_call), 3)
+
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_sequential_calls_are_not_coalesced(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+        self.assertEqual(flight.do("key", lambda: 2), 2)
+        self.assertEqual(flight.stats()["hits"], 0)
+
+    def test_waiters_stop_at_their_deadline(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        leader = threading.Thread(
+            target=lambda: flight.do("key", lambda: release.wait(1))
+        )
+        leader.start()
+        time.sleep(0.02)
+        try:
+            with deadline(0.05):
+                start = time.monotonic()
+                with self.assertRaises(SpotifyTimeoutError):
+                    flight.do("key", lambda: 2)
+            self.assertLess(time.monotonic() - start, 0.5)
+        finally:
+            release.set()
+            leader.join()
+        self.assertEqual(flight.stats()["waiters"], 0)
+
+    def test_waiters_retry_after_leader_deadline(self):
+        flight = SingleFlight()
+        calls = []
+
+        def call():
+            calls.append(1)
+            time.sleep(0.05)
+            if len(calls) == 1:
+                raise SpotifyTimeoutError()
+            return "ok"
+
+        results, errors = _run_in_threads(lambda: flight.do("key", call), 3)
+
+        self.assertEqual(len(calls), 2)
+        self.assertIsInstance(errors[results.index(None)], SpotifyTimeoutError)
+        self.assertEqual(results.count("ok"), 2)
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_are_coalesced(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def slow_call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1]
+
+        async def go():
+            return await asyncio.gather(
+                *(flight.do("key", slow_call) for _ in range(4))
+            )
+
+        self.assertEqual(asyncio.run(go()), [[1]] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.hits, 3)
+
+    def test_waiters_stop_at_their_deadline(self):
+        flight = AsyncSingleFlight()
+
+        async def slow_call():
+            await asyncio.sleep(1)
+            return 1
+
+        async def waiter():
+            with deadline(0.05):
+                return await flight.do("key", slow_call)
+
+        async def go():
+            leader = asyncio.ensure_future(flight.do("key", slow_call))
+            await asyncio.sleep(0)
+            try:
+                await waiter()
+            finally:
+                leader.cancel()
+
+        with self.assertRaises(SpotifyTimeoutError):
+            asyncio.run(go())
+
+    def test_waiters_retry_after_leader_deadline(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise SpotifyTimeoutError()
+            return "ok"
+
+        async def go():
+            return await asyncio.gather(
+                *(flight.do("key", call) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(go())
+        self.assertIsInstance(results[0], SpotifyTimeoutError)
+        self.assertEqual(results[1:], ["ok", "ok"])
+        self.assertEqual(len(calls), 2)
+
+
+class TestSpotifySingleFlight(unittest.TestCase):
+    def test_identical_gets_share_one_request(self):
+        def request(*args, **kwargs):
+            time.sleep(0.05)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'{"snapshot_id": "SNAP"}'
+            return response
+
+        session = mock.Mock(spec=requests.Session)
+        session.request.side_effect = request
+        sp = Spotify(
+            auth="TOKEN", requests_session=session, single_flight=SingleFlight()
+        )
+
+        results, errors = _run_in_threads(
+            lambda: sp.playlist("PLID", fields="snapshot_id"), 4
+        )
+
+        self.assertEqual(results, [{"snapshot_id": "SNAP"}] * 4)
+        self.assertEqual(session.request.call_count, 1)
@@ -0,0 +1,49 @@
+import logging
+import unittest
+
+import requests
+
+from spotipy import RequestTracer, Spotify
+from tests.helpers import make_response
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    from unittest import mock
+
+
+class TestRequestTracer(unittest.TestCase):
+    def setUp(self):
+        self.session = mock.Mock(spec=requests.Session)
+        self.session.request.return_value = make_response(
+            200, b'{"items": ["' + b"x" * 100 + b'"]}'
+        )
+
+    def test_sampled_and_redacted(self):
+        tracer = RequestTracer(every=2, max_body_size=20)
+        sp = Spotify(auth="SECRET-TOKEN", requests_session=self.session, tracer=tracer)
+
+        with self.assertLogs("spotipy.tracing", level="INFO") as logs:
+            for _ in range(4):
+                sp.me()
+
+        self.assertEqual(len(logs.output), 2)
+        self.assertNotIn("SECRET-TOKEN", logs.output[0])
+        self.assertIn("<redacted>", logs.output[0])
+        self.assertIn("(115 bytes)", logs.output[0])
+        self.assertIn("GET https://api.spotify.com/v1/me", logs.output[0])
+
+    def test_disabled_logger_costs_nothing(self):
+        tracer = RequestTracer(every=1, logger=logging.getLogger("spotipy.quiet"))
+        tracer.logger.setLevel(logging.WARNING)
+        sp = Spotify(auth="TOKEN", requests_session=self.session, tracer=tracer)
+
+        with mock.patch.object(tracer, "trace") as trace:
+            sp.me()
+        trace.assert_not_called()
+
+    def test_no_tracer_no_logs(self):
+        sp = Spotify(auth="TOKEN", requests_session=self.session)
+        with mock.patch("spotipy.client.logger") as logger:
+            sp.me()
+        logger.debug.assert_not_called()